@@ -1,24 +1,23 @@
 from storage.db import get_connection
 
 def fetch_globe_relations():
+    # served from the relation_daily aggregate (see storage/aggregates.py)
     with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
                 SELECT
-                    actor_state   AS source,
-                    target_state  AS target,
-                    event_type    AS type,
-                    COUNT(*)      AS weight
-                FROM actortargetevents
-                WHERE
-                    states_resolved = TRUE
-                    AND actor_state IS NOT NULL
-                    AND target_state IS NOT NULL
+                    sa.name                AS source,
+                    st.name                AS target,
+                    r.event_type           AS type,
+                    SUM(r.weight)::bigint  AS weight
+                FROM relation_daily r
+                JOIN states sa ON sa.iso3 = r.actor_iso3
+                JOIN states st ON st.iso3 = r.target_iso3
                 GROUP BY
-                    actor_state,
-                    target_state,
-                    event_type;
+                    sa.name,
+                    st.name,
+                    r.event_type;
                 """
             )
 
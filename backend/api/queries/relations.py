@@ -1,61 +1,134 @@
 from storage.db import get_connection
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import date
 
 
-def fetch_relations(
+# Rows pulled per round trip when streaming
+STREAM_FETCH_SIZE = 2000
+
+_COLUMNS = (
+    "source",        # ISO3
+    "target",        # ISO3
+    "event_type",
+    "weight",
+    "source_lat",
+    "source_lon",
+    "target_lat",
+    "target_lon",
+)
+
+
+def _relations_query(
     from_date: Optional[date] = None,
     to_date: Optional[date] = None,
-):
-    sql = """
+    event_type: Optional[str] = None,
+    country: Optional[str] = None,
+    min_weight: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> Tuple[str, List]:
+    # Sums day buckets of the relation_daily aggregate; both bounds
+    # are inclusive days. Only the filters actually given become
+    # predicates, so a window is a range scan of the primary key.
+    where = []
+    params: List = []
+    if from_date is not None:
+        where.append("r.day >= %s")
+        params.append(from_date)
+    if to_date is not None:
+        where.append("r.day <= %s")
+        params.append(to_date)
+    if event_type is not None:
+        where.append("r.event_type = %s")
+        params.append(event_type)
+    if country is not None:
+        # either side of the relation
+        where.append("(r.actor_iso3 = %s OR r.target_iso3 = %s)")
+        params.extend([country, country])
+
+    having = ""
+    if min_weight is not None:
+        having = "HAVING SUM(r.weight) >= %s"
+        params.append(min_weight)
+
+    top_n = ""
+    if limit is not None:
+        top_n = "ORDER BY weight DESC LIMIT %s"
+        params.append(limit)
+
+    sql = f"""
+    WITH totals AS (
+        SELECT
+            r.actor_iso3,
+            r.target_iso3,
+            r.event_type,
+            SUM(r.weight)::bigint AS weight
+        FROM relation_daily r
+        {"WHERE " + " AND ".join(where) if where else ""}
+        GROUP BY
+            r.actor_iso3,
+            r.target_iso3,
+            r.event_type
+        {having}
+        {top_n}
+    )
     SELECT
-        ate.actor_state_iso3   AS source,
-        ate.target_state_iso3  AS target,
-        ate.event_type,
-        COUNT(*)               AS weight,
+        t.actor_iso3           AS source,
+        t.target_iso3          AS target,
+        t.event_type,
+        t.weight,
         sa.latitude            AS source_lat,
         sa.longitude           AS source_lon,
         st.latitude            AS target_lat,
         st.longitude           AS target_lon
-    FROM actortargetevents ate
-    JOIN events ev ON ev.event_id = ate.event_id
-    JOIN states sa ON sa.iso3 = ate.actor_state_iso3
-    JOIN states st ON st.iso3 = ate.target_state_iso3
-    WHERE
-        ate.actor_state_iso3 IS NOT NULL
-        AND ate.target_state_iso3 IS NOT NULL
-        AND ate.event_type IS NOT NULL
-        AND (%s IS NULL OR ev.created_at >= %s)
-        AND (%s IS NULL OR ev.created_at <= %s)
-    GROUP BY
-        ate.actor_state_iso3,
-        ate.target_state_iso3,
-        ate.event_type,
-        sa.latitude,
-        sa.longitude,
-        st.latitude,
-        st.longitude
-    ORDER BY weight DESC;
+    FROM totals t
+    JOIN states sa ON sa.iso3 = t.actor_iso3
+    JOIN states st ON st.iso3 = t.target_iso3
+    ORDER BY t.weight DESC
     """
+    return sql, params
+
+
+def fetch_relations(
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    *,
+    event_type: Optional[str] = None,
+    country: Optional[str] = None,
+    min_weight: Optional[int] = None,
+    limit: Optional[int] = None,
+):
+    sql, params = _relations_query(
+        from_date, to_date, event_type, country, min_weight, limit
+    )
 
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                sql,
-                (from_date, from_date, to_date, to_date),
-            )
+            cur.execute(sql, params)
             rows = cur.fetchall()
 
-    return [
-        {
-            "source": r[0],        # ISO3
-            "target": r[1],        # ISO3
-            "event_type": r[2],
-            "weight": r[3],
-            "source_lat": r[4],
-            "source_lon": r[5],
-            "target_lat": r[6],
-            "target_lon": r[7],
-        }
-        for r in rows
-    ]
+    return [dict(zip(_COLUMNS, r)) for r in rows]
+
+
+def iter_relations(
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    *,
+    event_type: Optional[str] = None,
+    country: Optional[str] = None,
+    min_weight: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> Iterator[Dict]:
+    """
+    Same rows as fetch_relations, read through a server-side cursor so
+    the result set is never fully held in memory.
+    """
+    sql, params = _relations_query(
+        from_date, to_date, event_type, country, min_weight, limit
+    )
+
+    with get_connection() as conn:
+        with conn.cursor(name="relations_stream") as cur:
+            cur.itersize = STREAM_FETCH_SIZE
+            cur.execute(sql, params)
+            for r in cur:
+                yield dict(zip(_COLUMNS, r))
@@ -0,0 +1,73 @@
+from storage.db import get_connection
+from typing import List, Literal, Optional
+from datetime import date
+
+
+Granularity = Literal["day", "week", "month"]
+
+
+def fetch_relation_timeseries(
+    granularity: Granularity = "day",
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    *,
+    event_type: Optional[str] = None,
+    country: Optional[str] = None,
+):
+    """
+    Weights per (bucket, actor ISO3, target ISO3, event type), oldest
+    bucket first. Days come from relation_daily, weeks/months from the
+    precomputed relation_rollup. Buckets overlapping `from` are included
+    whole.
+    """
+    if granularity == "day":
+        source = "relation_daily r"
+        bucket = "r.day"
+        where = []
+        params: List = []
+    else:
+        source = "relation_rollup r"
+        bucket = "r.bucket"
+        where = ["r.granularity = %s"]
+        params = [granularity]
+
+    if from_date is not None:
+        where.append(f"{bucket} >= date_trunc(%s, %s::date)::date")
+        params.extend([granularity, from_date])
+    if to_date is not None:
+        where.append(f"{bucket} <= %s")
+        params.append(to_date)
+    if event_type is not None:
+        where.append("r.event_type = %s")
+        params.append(event_type)
+    if country is not None:
+        where.append("(r.actor_iso3 = %s OR r.target_iso3 = %s)")
+        params.extend([country, country])
+
+    sql = f"""
+    SELECT
+        {bucket}          AS bucket,
+        r.actor_iso3      AS source,
+        r.target_iso3     AS target,
+        r.event_type,
+        r.weight
+    FROM {source}
+    {"WHERE " + " AND ".join(where) if where else ""}
+    ORDER BY {bucket}, r.weight DESC;
+    """
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+
+    return [
+        {
+            "bucket": r[0].isoformat(),
+            "source": r[1],        # ISO3
+            "target": r[2],        # ISO3
+            "event_type": r[3],
+            "weight": r[4],
+        }
+        for r in rows
+    ]
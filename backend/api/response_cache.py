@@ -0,0 +1,53 @@
+import os
+import hashlib
+from typing import Any, Callable
+
+from fastapi import Request, Response
+
+from api.serialization import dumps
+from storage.cache import TieredCache
+from storage.data_version import current_data_version
+
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 256))
+
+# Serialized bodies keyed by ETag (data version + normalized query)
+RESPONSE_CACHE = TieredCache("responses", max_size=RESPONSE_CACHE_SIZE)
+
+# Clients may keep a copy but must revalidate it (cheap 304s)
+_CACHE_CONTROL = "no-cache"
+
+
+def _etag(key: str, version: int) -> str:
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison, as for GET conditionals
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
+def cached_json(request: Request, key: str, produce: Callable[[], Any]) -> Response:
+    """
+    JSON response for `produce()`, cached until the data version changes.
+    A matching If-None-Match is answered 304 without calling `produce`.
+    `key` must identify the normalized query parameters.
+    """
+    etag = _etag(key, current_data_version())
+    headers = {"ETag": etag, "Cache-Control": _CACHE_CONTROL}
+
+    if _matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    hit, body = RESPONSE_CACHE.get(etag)
+    if not hit:
+        body = dumps(produce())
+        RESPONSE_CACHE.set(etag, body)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional
-from storage.db import get_connection
+from storage.db import get_connection, pool_stats, run_db
 from storage.refresh_db import (
     full_reboot_events,
     incremental_refresh_events,
@@ -12,36 +13,54 @@ from ingestion.configs.time_windows import (
 )
 from api.schemas import FetchPeriodRequest
 from api.globe import fetch_globe_relations
-from storage.jobs import start_job, finish_job, fail_job, is_job_running
-from llm_actor_target_processing.processor import process
-from llm_actor_target_processing.row_selectors import ProcessingMode
-from api.queries.relations import fetch_relations
+from api.response_cache import cached_json, RESPONSE_CACHE
+from api.serialization import iter_json_array
+from storage.jobs import start_job, run_job, expire_stale_jobs
+from llm_actor_target_processing.processor import process, DEFAULT_CONCURRENCY
+from llm_actor_target_processing.row_selectors import ProcessingMode, WorkerMode, claim_stats
+from llm_actor_target_processing.worker import run_worker, WORKER_JOB_NAME
+from api.queries.relations import fetch_relations, iter_relations
+from api.queries.timeseries import fetch_relation_timeseries, Granularity
 from datetime import date
 
 
 router = APIRouter()
 
 
+async def _start_background_job(background_tasks: BackgroundTasks, job_name: str, fn, *args, **kwargs):
+    # claim first so a second request gets a 409 instead of a parallel run
+    if not await run_db(start_job, job_name):
+        raise HTTPException(status_code=409, detail=f"{job_name} job already running")
+    background_tasks.add_task(run_job, job_name, fn, *args, **kwargs)
+
+
+# Ingestion runs in the background; poll /jobs/{job_name} for progress.
+
 # Full reboot option
 @router.post("/reboot-full")
-async def reboot_full():
-    await full_reboot_events(FULL_REBOOT_MONTHS)
-    return {"status": "completed", "months_back": FULL_REBOOT_MONTHS}
+async def reboot_full(background_tasks: BackgroundTasks):
+    await _start_background_job(background_tasks, "full_reboot", full_reboot_events, FULL_REBOOT_MONTHS)
+    return {"status": "started", "job_name": "full_reboot", "months_back": FULL_REBOOT_MONTHS}
 
 
 # Up to date option
 @router.post("/refresh-incremental")
-async def refresh_incremental():
-    await incremental_refresh_events(INCREMENTAL_REFRESH_MONTHS)
-    return {"status": "completed", "months_back": INCREMENTAL_REFRESH_MONTHS}
+async def refresh_incremental(background_tasks: BackgroundTasks):
+    await _start_background_job(
+        background_tasks, "incremental_refresh", incremental_refresh_events, INCREMENTAL_REFRESH_MONTHS
+    )
+    return {"status": "started", "job_name": "incremental_refresh", "months_back": INCREMENTAL_REFRESH_MONTHS}
 
 
 # Custom period option
 @router.post("/fetch-period")
-async def fetch_period(payload: FetchPeriodRequest):
-    await fetch_events_for_period(payload.start_date, payload.end_date)
+async def fetch_period(payload: FetchPeriodRequest, background_tasks: BackgroundTasks):
+    await _start_background_job(
+        background_tasks, "fetch_period", fetch_events_for_period, payload.start_date, payload.end_date
+    )
     return {
-        "status": "completed",
+        "status": "started",
+        "job_name": "fetch_period",
         "start_date": payload.start_date,
         "end_date": payload.end_date,
     }
@@ -50,10 +69,14 @@ async def fetch_period(payload: FetchPeriodRequest):
 # Status endpoint
 @router.get("/jobs/{job_name}")
 def job_status(job_name: str):
+    expire_stale_jobs()
     with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                "SELECT status, started_at, finished_at, error FROM jobs WHERE job_name = %s",
+                """
+                SELECT status, started_at, finished_at, error, heartbeat_at, owner, progress
+                FROM jobs WHERE job_name = %s
+                """,
                 (job_name,),
             )
             row = cur.fetchone()
@@ -66,9 +89,18 @@ def job_status(job_name: str):
         "started_at": row[1],
         "finished_at": row[2],
         "error": row[3],
+        "heartbeat_at": row[4],
+        "owner": row[5],
+        "progress": row[6],
     }
 
 
+# DB connection pool usage (for sizing DB_POOL_MAX against API concurrency)
+@router.get("/db/pool")
+def db_pool_stats():
+    return pool_stats()
+
+
 # Reset/cancel a stuck job
 @router.post("/jobs/{job_name}/reset")
 def reset_job_endpoint(job_name: str):
@@ -81,57 +113,163 @@ def reset_job_endpoint(job_name: str):
 # -------------------- LLM Processing Routes -------------
 
 
-async def run_llm_processing_job(mode, limit):
-    """
-    Background task wrapper for LLM processing.
-    Handles job lifecycle transitions.
-    """
-    try:
-        await process(mode=mode, limit=limit)
-        finish_job("llm_processing")
-    except Exception as e:
-        fail_job("llm_processing", str(e))
-
-
 # LLM processing of raw events
 @router.post("/process")
 async def process_events(
     background_tasks: BackgroundTasks,
     mode: ProcessingMode,
     limit: int | None = None,
+    concurrency: int | None = Query(None, ge=1, le=64),
+    extract_batch_size: int | None = Query(None, ge=1, le=50),
+    relevance_threshold: float | None = Query(None, ge=0),
 ):
-    if is_job_running("llm_processing"):
-        raise HTTPException(
-            status_code=409,
-            detail="LLM processing job already running",
-        )
-
-    start_job("llm_processing")
-
-    background_tasks.add_task(
-        run_llm_processing_job,
-        mode,
-        limit,
+    await _start_background_job(
+        background_tasks,
+        "llm_processing",
+        process,
+        mode=mode,
+        limit=limit,
+        concurrency=concurrency,
+        extract_batch_size=extract_batch_size,
+        relevance_threshold=relevance_threshold,
     )
 
     return {
         "status": "started",
         "job_name": "llm_processing",
+        "concurrency": concurrency or DEFAULT_CONCURRENCY,
+    }
+
+
+# Worker mode: rows are claimed in small batches, so any number of workers
+# (this endpoint on each API replica, or `python -m
+# llm_actor_target_processing.worker` on other nodes) can run at once.
+@router.post("/process/worker")
+async def start_process_worker(
+    background_tasks: BackgroundTasks,
+    mode: WorkerMode = "missing_states",
+    concurrency: int | None = Query(None, ge=1, le=64),
+    batch_size: int | None = Query(None, ge=1, le=500),
+    extract_batch_size: int | None = Query(None, ge=1, le=50),
+    relevance_threshold: float | None = Query(None, ge=0),
+    drain: bool = True,
+):
+    await _start_background_job(
+        background_tasks,
+        WORKER_JOB_NAME,
+        run_worker,
+        mode=mode,
+        concurrency=concurrency,
+        batch_size=batch_size,
+        extract_batch_size=extract_batch_size,
+        relevance_threshold=relevance_threshold,
+        drain=drain,
+    )
+    return {"status": "started", "job_name": WORKER_JOB_NAME, "mode": mode}
+
+
+# Running workers (all nodes) and the rows each one holds
+@router.get("/process/workers")
+def process_workers():
+    expire_stale_jobs()
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT job_name, owner, started_at, heartbeat_at, progress
+                FROM jobs
+                WHERE job_name LIKE 'llm_worker:%' AND status = 'running'
+                ORDER BY job_name
+                """
+            )
+            rows = cur.fetchall()
+
+    return {
+        "workers": [
+            {
+                "job_name": r[0],
+                "owner": r[1],
+                "started_at": r[2],
+                "heartbeat_at": r[3],
+                "progress": r[4],
+            }
+            for r in rows
+        ],
+        "claimed_rows": claim_stats(),
     }
 
 
 # -------------------- Globe visualization -------------
 
 
+# Responses are cached per data version (bumped when a job finishes)
+# and revalidated with ETag / If-None-Match.
+
 # Building arcs
 @router.get("/globe/relations")
-def globe_relations():
-    return fetch_globe_relations()
+def globe_relations(request: Request):
+    return cached_json(request, "globe", fetch_globe_relations)
 
 
 @router.get("/relations")
 def get_relations(
+    request: Request,
     from_date: Optional[date] = Query(None, alias="from"),
     to_date: Optional[date] = Query(None, alias="to"),
+    event_type: Optional[str] = None,
+    country: Optional[str] = Query(None, min_length=3, max_length=3),
+    min_weight: Optional[int] = Query(None, ge=1),
+    limit: Optional[int] = Query(None, ge=1, le=100_000),
+    stream: bool = False,
 ):
-    return fetch_relations(from_date=from_date, to_date=to_date)
+    filters = dict(
+        from_date=from_date,
+        to_date=to_date,
+        event_type=event_type.upper() if event_type else None,
+        country=country.upper() if country else None,
+        min_weight=min_weight,
+        limit=limit,
+    )
+
+    # large windows: serialize rows as they are read, uncached
+    if stream:
+        return StreamingResponse(
+            iter_json_array(iter_relations(**filters)),
+            media_type="application/json",
+        )
+
+    key = "relations:" + ":".join(
+        "" if value is None else str(value) for value in filters.values()
+    )
+    return cached_json(request, key, lambda: fetch_relations(**filters))
+
+
+# One response per animation: weights per bucket instead of a call per frame
+@router.get("/relations/timeseries")
+def get_relation_timeseries(
+    request: Request,
+    granularity: Granularity = "day",
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    event_type: Optional[str] = None,
+    country: Optional[str] = Query(None, min_length=3, max_length=3),
+):
+    filters = dict(
+        from_date=from_date,
+        to_date=to_date,
+        event_type=event_type.upper() if event_type else None,
+        country=country.upper() if country else None,
+    )
+    key = f"timeseries:{granularity}:" + ":".join(
+        "" if value is None else str(value) for value in filters.values()
+    )
+    return cached_json(
+        request,
+        key,
+        lambda: fetch_relation_timeseries(granularity, **filters),
+    )
+
+
+@router.get("/cache/responses")
+def response_cache_stats():
+    return RESPONSE_CACHE.snapshot()
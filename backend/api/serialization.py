@@ -0,0 +1,44 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+    import json
+
+
+# Streamed responses are flushed in chunks of roughly this many bytes
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"not JSON serializable: {type(value).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact JSON bytes; orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def iter_json_array(items: Iterable[Any]) -> Iterator[bytes]:
+    """Serialize `items` as one JSON array, incrementally."""
+    buf = bytearray(b"[")
+    first = True
+    for item in items:
+        if not first:
+            buf += b","
+        first = False
+        buf += dumps(item)
+        if len(buf) >= STREAM_CHUNK_BYTES:
+            yield bytes(buf)
+            buf.clear()
+    buf += b"]"
+    yield bytes(buf)
@@ -2,6 +2,10 @@ from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api.routes import router as api_router
+from llm_actor_target_processing.llm_client import close_http_clients
+from storage.schema import ensure_schema
+from storage.db import close_pool
+from storage.jobs import expire_stale_jobs
 
 load_dotenv()
 
@@ -19,6 +23,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+def startup():
+    ensure_schema()
+    # jobs left running by a crashed worker
+    expire_stale_jobs()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await close_http_clients()
+    close_pool()
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
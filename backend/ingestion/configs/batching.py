@@ -0,0 +1,2 @@
+# Posts fetched, cleaned and inserted per ingestion chunk
+INGEST_CHUNK_SIZE = 500
@@ -1,2 +1,12 @@
 # Telegram Specific Configs 
 telegram_channels = ["worldnews"]
+
+# Channels fetched at the same time during incremental refresh
+TELEGRAM_MAX_CONCURRENT_CHANNELS = 4
+
+# Flood waits up to this many seconds are slept through by Telethon itself;
+# longer ones pause every channel fetch before retrying
+TELEGRAM_FLOOD_SLEEP_THRESHOLD = 120
+
+# Period fetches are split into sub-ranges of this many days, fetched in parallel
+TELEGRAM_PERIOD_SPLIT_DAYS = 7
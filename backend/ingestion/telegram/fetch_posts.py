@@ -1,73 +1,329 @@
 import os
+import time
+import asyncio
+from contextlib import aclosing
+from typing import Dict, Optional
 from telethon import TelegramClient
+from telethon.errors import FloodWaitError
 from datetime import datetime, timezone, timedelta
 
-from ingestion.configs.sources import telegram_channels
+from ingestion.configs.sources import (
+    telegram_channels,
+    TELEGRAM_MAX_CONCURRENT_CHANNELS,
+    TELEGRAM_FLOOD_SLEEP_THRESHOLD,
+    TELEGRAM_PERIOD_SPLIT_DAYS,
+)
+from ingestion.configs.batching import INGEST_CHUNK_SIZE
 
 
-async def fetch_telegram(months_back: int):
-    """Fetch posts from past date until today (full reboot and refresh functions)"""
+def _telegram_credentials():
     api_id = os.getenv("TELEGRAM_API_ID")
     api_hash = os.getenv("TELEGRAM_API_HASH")
 
     if not api_id or not api_hash:
         raise RuntimeError("TELEGRAM_API_ID or TELEGRAM_API_HASH not set")
 
-    cutoff = datetime.now(timezone.utc) - timedelta(days=30 * months_back)
+    return api_id, api_hash
+
+
+def _to_post(msg, channel_name: str) -> dict:
+    return {
+        "created_at": msg.date.isoformat(),
+        "text_raw": msg.text,
+        "source": "telegram",
+        "lang": "eng",
+        "channel": channel_name,
+        "message_id": msg.id,
+    }
+
+
+class FloodAwareLimiter:
+    """
+    Bounds concurrent channel fetches; a long flood wait on any channel
+    pauses every fetch until it expires: new fetches before they start,
+    running ones before their next page (see wait_if_paused).
+    """
+
+    def __init__(self, max_concurrency: int):
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._resume_at = 0.0
 
-    channel_name = telegram_channels[0]
-    msg_batch = []
+    async def wait_if_paused(self):
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
 
-    async with TelegramClient("telegram_fetch", api_id, api_hash) as client:
+    def pause(self, seconds: float):
+        self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    async def __aenter__(self):
+        await self._sem.acquire()
+        await self.wait_if_paused()
+        return self
+
+    async def __aexit__(self, *exc):
+        self._sem.release()
+        return False
+
+
+async def _iter_channel_since(
+    client: TelegramClient,
+    channel_name: str,
+    min_id: Optional[int],
+    cutoff: datetime,
+    limiter: FloodAwareLimiter,
+    chunk_size: int,
+):
+    """
+    Yield chunks of posts newer than `min_id` (or `cutoff` on first run),
+    oldest first, so a committed chunk is always a safe resume point.
+    """
+    async with limiter:
         channel = await client.get_entity(channel_name)
+        last_id = min_id or 0
+        chunk = []
 
-        async for msg in client.iter_messages(channel, limit=5000):
-            if msg.date < cutoff:
+        while True:
+            if last_id:
+                kwargs = {"min_id": last_id, "reverse": True}
+            else:
+                kwargs = {"offset_date": cutoff, "reverse": True}
+            try:
+                async for msg in client.iter_messages(channel, **kwargs):
+                    # messages come in pages; a flood wait on another
+                    # channel holds this one before its next request
+                    await limiter.wait_if_paused()
+                    last_id = msg.id
+                    if not msg.text:
+                        continue
+
+                    chunk.append(_to_post(msg, channel_name))
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
                 break
-            if not msg.text:
+            except FloodWaitError as e:
+                print(f"[telegram] {channel_name}: flood wait {e.seconds}s")
+                limiter.pause(e.seconds)
+                await limiter.wait_if_paused()
+
+        if chunk:
+            yield chunk
+
+
+async def _merge_chunk_streams(streams, max_concurrency: int):
+    """
+    Run async chunk iterators concurrently and yield their chunks as they
+    arrive. A failing stream doesn't stop the others; failures are raised
+    together once every stream has finished.
+    """
+    # bounded so memory stays flat if inserts are slower than fetches
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_concurrency * 2)
+    done = object()
+    errors = []
+
+    async def produce(name: str, stream):
+        try:
+            async for chunk in stream:
+                await queue.put(chunk)
+        except Exception as e:
+            print(f"[telegram] {name}: fetch failed: {e}")
+            errors.append(f"{name}: {e}")
+        finally:
+            # frees the limiter slot even if cancelled at queue.put
+            await stream.aclose()
+        # not reached when cancelled: the consumer is gone, and a full
+        # queue would block the cancelled task forever
+        await queue.put(done)
+
+    tasks = [asyncio.create_task(produce(name, stream)) for name, stream in streams]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            item = await queue.get()
+            if item is done:
+                remaining -= 1
                 continue
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
-            msg_batch.append({
-                "created_at": msg.date.isoformat(),
-                "text_raw": msg.text,
-                "source": "telegram",
-                "lang": "eng",
-            })
+    if errors:
+        raise RuntimeError("fetch failed for " + "; ".join(errors))
 
-    return msg_batch
 
+def _client(api_id, api_hash) -> TelegramClient:
+    return TelegramClient(
+        "telegram_fetch",
+        api_id,
+        api_hash,
+        flood_sleep_threshold=TELEGRAM_FLOOD_SLEEP_THRESHOLD,
+    )
+
+
+async def iter_telegram_incremental(
+    high_water_marks: Dict[str, int],
+    months_back: int,
+    chunk_size: int = INGEST_CHUNK_SIZE,
+    max_concurrency: int = TELEGRAM_MAX_CONCURRENT_CHANNELS,
+):
+    """
+    Stream only posts newer than each channel's high-water mark, fetching
+    all configured channels concurrently. Channels without a mark start
+    `months_back` months ago.
+    """
+    api_id, api_hash = _telegram_credentials()
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=30 * months_back)
+    limiter = FloodAwareLimiter(max_concurrency)
 
-async def fetch_telegram_period(
+    async with _client(api_id, api_hash) as client:
+        streams = [
+            (
+                channel_name,
+                _iter_channel_since(
+                    client,
+                    channel_name,
+                    high_water_marks.get(channel_name),
+                    cutoff,
+                    limiter,
+                    chunk_size,
+                ),
+            )
+            for channel_name in telegram_channels
+        ]
+        # closed right away if the consumer stops early or raises
+        async with aclosing(_merge_chunk_streams(streams, max_concurrency)) as merged:
+            async for chunk in merged:
+                yield chunk
+
+
+async def iter_telegram(months_back: int, chunk_size: int = INGEST_CHUNK_SIZE):
+    """
+    Stream every configured channel's posts of the last `months_back`
+    months (full reboot), oldest first per channel like the incremental
+    refresh, so the high-water mark committed with each chunk is always
+    a safe resume point if the reboot stops partway.
+    """
+    async with aclosing(iter_telegram_incremental({}, months_back, chunk_size)) as chunks:
+        async for chunk in chunks:
+            yield chunk
+
+
+def _as_utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def split_period(
     start_date: datetime,
     end_date: datetime,
+    split_days: int = TELEGRAM_PERIOD_SPLIT_DAYS,
 ):
-    """Fetch posts from user provided start / end period"""
-    api_id = os.getenv("TELEGRAM_API_ID")
-    api_hash = os.getenv("TELEGRAM_API_HASH")
-
-    if not api_id or not api_hash:
-        raise RuntimeError("TELEGRAM_API_ID or TELEGRAM_API_HASH not set")
+    """
+    Split [start_date, end_date] into consecutive sub-ranges of at most
+    `split_days` days, as (start, end) pairs with an exclusive end except
+    for the last one.
+    """
+    bounds = []
+    cursor = start_date
+    step = timedelta(days=max(1, split_days))
+    while cursor + step < end_date:
+        bounds.append((cursor, cursor + step))
+        cursor += step
+    bounds.append((cursor, end_date))
+    return bounds
 
-    channel_name = telegram_channels[0]
-    msg_batch = []
 
-    async with TelegramClient("telegram_fetch", api_id, api_hash) as client:
+async def _iter_channel_range(
+    client: TelegramClient,
+    channel_name: str,
+    range_start: datetime,
+    range_end: datetime,
+    inclusive_end: bool,
+    limiter: FloodAwareLimiter,
+    chunk_size: int,
+):
+    """
+    Yield chunks of posts in [range_start, range_end), seeking straight to
+    range_end with offset_date and walking backwards until range_start.
+    """
+    async with limiter:
         channel = await client.get_entity(channel_name)
+        # offset_date is exclusive: nudge it to keep posts at exactly range_end
+        offset_date = range_end + timedelta(seconds=1) if inclusive_end else range_end
+        last_id = None
+        chunk = []
+
+        while True:
+            if last_id:
+                kwargs = {"offset_id": last_id}
+            else:
+                kwargs = {"offset_date": offset_date}
+            try:
+                async for msg in client.iter_messages(channel, **kwargs):
+                    # messages come in pages; a flood wait on another
+                    # channel holds this one before its next request
+                    await limiter.wait_if_paused()
+                    last_id = msg.id
+                    if msg.date < range_start:
+                        break
+                    if msg.date > range_end or (msg.date == range_end and not inclusive_end):
+                        continue
+                    if not msg.text:
+                        continue
 
-        async for msg in client.iter_messages(channel, limit=10000):
-            if msg.date < start_date:
+                    chunk.append(_to_post(msg, channel_name))
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
                 break
-            if msg.date > end_date:
-                continue
-            if not msg.text:
-                continue
+            except FloodWaitError as e:
+                print(f"[telegram] {channel_name}: flood wait {e.seconds}s")
+                limiter.pause(e.seconds)
+                await limiter.wait_if_paused()
+
+        if chunk:
+            yield chunk
+
+
+async def iter_telegram_period(
+    start_date: datetime,
+    end_date: datetime,
+    chunk_size: int = INGEST_CHUNK_SIZE,
+    max_concurrency: int = TELEGRAM_MAX_CONCURRENT_CHANNELS,
+):
+    """
+    Stream posts from user provided start / end period, in chunks.
+    Each channel's window is split into sub-ranges fetched in parallel,
+    each one seeking directly to its end date.
+    """
+    api_id, api_hash = _telegram_credentials()
 
-            msg_batch.append({
-                "created_at": msg.date.isoformat(),
-                "text_raw": msg.text,
-                "source": "telegram",
-                "lang": "eng",
-            })
+    start_date, end_date = _as_utc(start_date), _as_utc(end_date)
+    ranges = split_period(start_date, end_date)
+    limiter = FloodAwareLimiter(max_concurrency)
 
-    return msg_batch
+    async with _client(api_id, api_hash) as client:
+        streams = [
+            (
+                f"{channel_name} [{range_start:%Y-%m-%d}..{range_end:%Y-%m-%d}]",
+                _iter_channel_range(
+                    client,
+                    channel_name,
+                    range_start,
+                    range_end,
+                    range_end == end_date,
+                    limiter,
+                    chunk_size,
+                ),
+            )
+            for channel_name in telegram_channels
+            for range_start, range_end in ranges
+        ]
+        # closed right away if the consumer stops early or raises
+        async with aclosing(_merge_chunk_streams(streams, max_concurrency)) as merged:
+            async for chunk in merged:
+                yield chunk
 
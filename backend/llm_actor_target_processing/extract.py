@@ -1,9 +1,30 @@
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict
+import os
 import re
+import hashlib
 
 from llm_actor_target_processing.llm_client import OllamaClient
-from llm_actor_target_processing.helpers import extract_json_object
-from llm_actor_target_processing.prompts_extract import build_prompt
+from llm_actor_target_processing.helpers import extract_json_object, extract_json_array
+from llm_actor_target_processing.prompts_extract import build_prompt, build_batch_prompt
+from storage.cache import TieredCache, make_store
+
+ExtractedRow = Tuple[str, int, str, Optional[str], Optional[str], str]
+
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", 100_000))
+EXTRACTION_CACHE_TTL_S = float(os.getenv("EXTRACTION_CACHE_TTL_S", 90 * 24 * 3600))
+
+# Results per normalized sentence text, "no event" outcomes included
+EXTRACTION_CACHE = TieredCache(
+    "extraction",
+    max_size=EXTRACTION_CACHE_SIZE,
+    ttl_s=EXTRACTION_CACHE_TTL_S,
+    store=make_store(),
+)
+
+# Editing either prompt template changes this, so stale answers are never reused
+PROMPT_IDENTITY = hashlib.sha256(
+    (build_prompt("\0") + build_batch_prompt(["\0"])).encode("utf-8")
+).hexdigest()[:16]
 
 # -------------------------
 # Sentence splitting
@@ -17,6 +38,48 @@ def split_sentences(text: str) -> List[str]:
     return [s.strip() for s in _SENTENCE_SPLIT_RE.split(text) if s.strip()]
 
 
+# -------------------------
+# Extraction cache
+# -------------------------
+_WS_RE = re.compile(r"\s+")
+
+
+def _extraction_cache_key(sentence_text: str, model: str = "") -> str:
+    normalized = _WS_RE.sub(" ", sentence_text or "").strip().casefold()
+    blob = "||".join([PROMPT_IDENTITY, model, normalized]).encode("utf-8", errors="ignore")
+    return hashlib.sha256(blob).hexdigest()
+
+
+async def _get_cached(
+    event_id: str,
+    sentence_index: int,
+    sentence_text: str,
+    model: str,
+) -> Tuple[bool, Optional[ExtractedRow]]:
+    hit, cached = await EXTRACTION_CACHE.aget(_extraction_cache_key(sentence_text, model))
+    if not hit:
+        return False, None
+    if not cached.get("event"):
+        return True, None
+    return True, (
+        event_id,
+        sentence_index,
+        sentence_text,
+        cached.get("actor"),
+        cached.get("target"),
+        cached["event"],
+    )
+
+
+async def _set_cached(sentence_text: str, model: str, row: Optional[ExtractedRow]):
+    value = (
+        {"actor": row[3], "target": row[4], "event": row[5]}
+        if row
+        else {"actor": None, "target": None, "event": None}
+    )
+    await EXTRACTION_CACHE.aset(_extraction_cache_key(sentence_text, model), value)
+
+
 # -------------------------
 # LLM output parsing
 # -------------------------
@@ -25,14 +88,22 @@ def parse_llm_output(
     event_id: str,
     sentence_index: int,
     sentence_text: str,
-) -> Optional[Tuple[str, int, str, Optional[str], Optional[str], str]]:
+) -> Optional[ExtractedRow]:
     obj = extract_json_object(llm_output)
     if not obj:
         print(f"[parse] No JSON found in output")
         raise ValueError("Invalid JSON")
 
     print(f"[parse] Extracted JSON: {obj}")
-    
+    return _row_from_obj(obj, event_id, sentence_index, sentence_text)
+
+
+def _row_from_obj(
+    obj: dict,
+    event_id: str,
+    sentence_index: int,
+    sentence_text: str,
+) -> Optional[ExtractedRow]:
     actor = _normalize_field(obj.get("actor"))
     target = _normalize_field(obj.get("target"))
     event_type = _normalize_field(obj.get("event"))
@@ -52,67 +123,166 @@ def parse_llm_output(
     )
 
 
+def parse_batch_output(
+    llm_output: str,
+    items: List[Tuple[str, int, str]],
+) -> Dict[int, Optional[ExtractedRow]]:
+    """
+    Parse a batched JSON array back into per-item rows.
+    Returns {position: row or None} only for items the model answered
+    well-formed; missing or malformed positions are left out.
+    """
+    array = extract_json_array(llm_output)
+    if array is None:
+        print("[parse] No JSON array found in batch output")
+        return {}
+
+    parsed: Dict[int, Optional[ExtractedRow]] = {}
+    for obj in array:
+        if not isinstance(obj, dict):
+            continue
+        pos = obj.get("index")
+        if isinstance(pos, str) and pos.strip().isdigit():
+            pos = int(pos)
+        if not isinstance(pos, int) or not 0 <= pos < len(items) or pos in parsed:
+            continue
+        if "event" not in obj:
+            continue
+        event_id, sentence_index, sentence_text = items[pos]
+        parsed[pos] = _row_from_obj(obj, event_id, sentence_index, sentence_text)
+
+    return parsed
+
 
 # -------------------------
-# Extraction entry point
+# Extraction entry points
 # -------------------------
+async def extract_sentence(
+    event_id: str,
+    sentence_index: int,
+    sentence_text: str,
+    client: OllamaClient,
+) -> Optional[ExtractedRow]:
+    """
+    One LLM call (plus one repair attempt) for a single sentence,
+    unless the sentence text has been extracted before.
+    """
+    hit, row = await _get_cached(event_id, sentence_index, sentence_text, client.model)
+    if hit:
+        print(f"[extract] cache hit: {sentence_text[:50]}...")
+        return row
+
+    prompt = build_prompt(sentence_text)
+
+    # first attempt
+    llm_output = await client.run(prompt)
+    print(f"[extract] sentence: {sentence_text[:50]}...")
+    print(f"[extract] LLM output: {llm_output[:200]}...")
+
+    try:
+        row = parse_llm_output(
+            llm_output,
+            event_id,
+            sentence_index,
+            sentence_text,
+        )
+        if row:
+            print(f"[extract] parsed: actor={row[3]}, target={row[4]}, event={row[5]}")
+        else:
+            print(f"[extract] returned None (no event or UNDEFINED)")
+    except ValueError as e:
+        print(f"[extract] parse error: {e}, trying repair...")
+        # one repair attempt
+        repair_prompt = (
+            "Fix the JSON below. Do NOT change any values. "
+            "Return ONLY valid JSON.\n\n"
+            + llm_output
+        )
+
+        llm_output = await client.run(repair_prompt)
+        print(f"[extract] repair output: {llm_output[:200]}...")
+        row = parse_llm_output(
+            llm_output,
+            event_id,
+            sentence_index,
+            sentence_text,
+        )
+        if row:
+            print(f"[extract] repaired: actor={row[3]}, target={row[4]}, event={row[5]}")
+        else:
+            print("[extract] repair returned None")
+
+    await _set_cached(sentence_text, client.model, row)
+    return row
+
+
+async def extract_sentences_batch(
+    items: List[Tuple[str, int, str]],
+    client: OllamaClient,
+) -> List[Optional[ExtractedRow]]:
+    """
+    Extract several sentences with one LLM call.
+    input  → [(event_id, sentence_index, sentence_text), ...]
+    output → one row (or None for no event) per input item, same order
+
+    Cached sentences are answered without the LLM. Items missing from,
+    or malformed in, the returned array fall back to a single-sentence call.
+    """
+    results: Dict[int, Optional[ExtractedRow]] = {}
+    for pos, item in enumerate(items):
+        hit, row = await _get_cached(*item, client.model)
+        if hit:
+            results[pos] = row
+
+    uncached = [pos for pos in range(len(items)) if pos not in results]
+    if len(uncached) == 1:
+        results[uncached[0]] = await extract_sentence(*items[uncached[0]], client)
+    elif uncached:
+        batch = [items[pos] for pos in uncached]
+        llm_output = await client.run(build_batch_prompt([text for _, _, text in batch]))
+        print(f"[extract] batch of {len(batch)} sentences, LLM output: {llm_output[:200]}...")
+        parsed = parse_batch_output(llm_output, batch)
+        for i, row in parsed.items():
+            await _set_cached(batch[i][2], client.model, row)
+            results[uncached[i]] = row
+
+        missing = [pos for i, pos in enumerate(uncached) if i not in parsed]
+        if missing:
+            print(f"[extract] batch missing {len(missing)}/{len(batch)} items, falling back to single calls")
+        for pos in missing:
+            results[pos] = await extract_sentence(*items[pos], client)
+
+    return [results[pos] for pos in range(len(items))]
+
+
 async def extract_actor_target_from_text(
     event_id: str,
     text: str,
     client: OllamaClient,
-) -> List[Tuple[str, int, str, Optional[str], Optional[str], str]]:
+    batch_size: int = 1,
+) -> List[ExtractedRow]:
     """
     Pure async function:
     input  → event_id + text
     output → DB-ready rows
+
+    batch_size > 1 packs that many sentences into each prompt.
     """
 
     sentences = split_sentences(text)
     rows: List[Tuple] = []
 
-    for sentence_index, sentence_text in enumerate(sentences):
-        prompt = build_prompt(sentence_text)
-
-        # first attempt
-        llm_output = await client.run(prompt)
-        print(f"[extract] sentence: {sentence_text[:50]}...")
-        print(f"[extract] LLM output: {llm_output[:200]}...")
-
-        try:
-            row = parse_llm_output(
-                llm_output,
-                event_id,
-                sentence_index,
-                sentence_text,
-            )
-            if row:
-                print(f"[extract] parsed: actor={row[3]}, target={row[4]}, event={row[5]}")
-            else:
-                print(f"[extract] returned None (no event or UNDEFINED)")
-        except ValueError as e:
-            print(f"[extract] parse error: {e}, trying repair...")
-            # one repair attempt
-            repair_prompt = (
-                "Fix the JSON below. Do NOT change any values. "
-                "Return ONLY valid JSON.\n\n"
-                + llm_output
-            )
-
-            llm_output = await client.run(repair_prompt)
-            print(f"[extract] repair output: {llm_output[:200]}...")
-            row = parse_llm_output(
-                llm_output,
-                event_id,
-                sentence_index,
-                sentence_text,
-            )
+    if batch_size <= 1:
+        for sentence_index, sentence_text in enumerate(sentences):
+            row = await extract_sentence(event_id, sentence_index, sentence_text, client)
             if row:
-                print(f"[extract] repaired: actor={row[3]}, target={row[4]}, event={row[5]}")
-            else:
-                print("[extract] repair returned None")
+                rows.append(row)
+        return rows
 
-        if row:
-            rows.append(row)
+    items = [(event_id, idx, sentence) for idx, sentence in enumerate(sentences)]
+    for start in range(0, len(items), batch_size):
+        batch = await extract_sentences_batch(items[start:start + batch_size], client)
+        rows.extend(row for row in batch if row)
 
     return rows
 
@@ -0,0 +1,188 @@
+import re
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from llm_actor_target_processing.state_aliases import (
+    STATE_ALIASES,
+    GENERIC_ROLE_WORDS,
+)
+
+
+_NON_WORD_RE = re.compile(r"[^\w]+")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Casefold, strip accents, turn punctuation into single spaces."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_WORD_RE.sub(" ", text.casefold()).strip()
+
+
+class AhoCorasick:
+    """
+    Minimal Aho-Corasick automaton over characters.
+    Finds every occurrence of every pattern in one pass over the text.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, str]]):
+        # goto[state] = {char: next_state}; out[state] = [(pattern_len, value)]
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[Tuple[int, str]]] = [[]]
+
+        for pattern, value in patterns:
+            self._add(pattern, value)
+        self._build()
+
+    def _add(self, pattern: str, value: str):
+        state = 0
+        for ch in pattern:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        self.out[state].append((len(pattern), value))
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter_matches(self, text: str):
+        """Yield (start, end, value) for every pattern occurrence."""
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for length, value in self.out[state]:
+                yield i - length + 1, i + 1, value
+
+
+class Gazetteer:
+    """
+    Deterministic alias index: state names from the `states` table plus
+    STATE_ALIASES (demonyms, capitals, institutions).
+
+    An actor/target string resolves to a state only when every matched
+    alias points to the same state and the remaining words are generic
+    role words ("forces", "government", ...). Anything else is left to
+    the LLM.
+    """
+
+    def __init__(
+        self,
+        states_data: List[Tuple[str, str]],
+        aliases: Dict[str, List[str]] = STATE_ALIASES,
+    ):
+        # ISO3 -> state name as spelled in the `states` table
+        self.iso3_to_name = {iso3: name for name, iso3 in states_data if iso3}
+
+        alias_map: Dict[str, str] = {}
+        for name, iso3 in states_data:
+            if iso3:
+                alias_map[normalize_text(name)] = iso3
+        for iso3, names in aliases.items():
+            if iso3 not in self.iso3_to_name:
+                continue
+            for alias in names:
+                alias_map.setdefault(normalize_text(alias), iso3)
+
+        # pad with spaces so matches only land on whole words
+        self.automaton = AhoCorasick(
+            (f" {alias} ", iso3) for alias, iso3 in alias_map.items() if alias
+        )
+        self.stats = {"resolved": 0, "fallback": 0}
+
+    def _match(self, text: Optional[str]):
+        """(ISO3 of each selected match, covered mask, padded text) or None"""
+        norm = normalize_text(text)
+        if not norm:
+            return None
+        padded = f" {norm} "
+
+        # longest non-overlapping matches win ("democratic republic of the congo" over "congo")
+        matches = sorted(
+            self.automaton.iter_matches(padded),
+            key=lambda m: (m[0] - m[1], m[0]),
+        )
+        covered = [False] * len(padded)
+        selected = []
+        for start, end, iso3 in matches:
+            # inner span without the padding spaces
+            if any(covered[start + 1:end - 1]):
+                continue
+            for i in range(start + 1, end - 1):
+                covered[i] = True
+            selected.append(iso3)
+        return selected, covered, padded
+
+    def lookup(self, text: Optional[str]) -> Optional[str]:
+        """
+        Return the state name for `text`, or None when there is no match
+        or the match is ambiguous.
+        """
+        matched = self._match(text)
+        if matched is None:
+            return None
+        selected, covered, padded = matched
+
+        if not selected or len(set(selected)) != 1:
+            return None
+
+        leftover = "".join(" " if covered[i] else ch for i, ch in enumerate(padded)).split()
+        if any(word not in GENERIC_ROLE_WORDS for word in leftover):
+            return None
+
+        return self.iso3_to_name.get(selected[0])
+
+    def anchor(self, text: Optional[str]) -> Optional[str]:
+        """
+        ISO3 of the one state `text` names ("Israeli Prime Minister"),
+        other words allowed; None when it names none or several.
+        """
+        matched = self._match(text)
+        if matched is None:
+            return None
+        selected = set(matched[0])
+        return selected.pop() if len(selected) == 1 else None
+
+    def resolve_pair(
+        self,
+        actor: Optional[str],
+        target: Optional[str],
+    ) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Ground both sides deterministically, or return None so the
+        caller falls back to the LLM.
+        """
+        actor_state = self.lookup(actor)
+        target_state = self.lookup(target) if actor_state else None
+
+        if actor_state and target_state:
+            self.stats["resolved"] += 1
+            return {"actor_state": actor_state, "target_state": target_state}
+
+        self.stats["fallback"] += 1
+        return None
+
+    def snapshot(self) -> Dict[str, object]:
+        total = self.stats["resolved"] + self.stats["fallback"]
+        return {
+            **self.stats,
+            "avoided_ratio": round(self.stats["resolved"] / total, 4) if total else None,
+        }
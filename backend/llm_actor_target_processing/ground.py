@@ -1,14 +1,34 @@
-import time
+import os
+import re
+import asyncio
 import hashlib
 from typing import Optional, Dict, List
 
 from llm_actor_target_processing.llm_client import OllamaClient
 from llm_actor_target_processing.helpers import extract_json_object
 from llm_actor_target_processing.prompts_ground import build_prompt
+from storage.cache import TieredCache, make_store
+from llm_actor_target_processing.gazetteer import Gazetteer
 
 
-# In-memory cache (per run)
-IN_MEMORY_CACHE: Dict[str, Dict[str, Optional[str]]] = {}
+# Cache key granularity for pairs whose actor and target each name one
+# state (gazetteer anchor); any other pair ("the president", "forces")
+# depends on its sentence and is always keyed by it:
+#   "pair"     -> normalized actor + target
+#   "event"    -> normalized actor + target + event_type
+#   "sentence" -> actor + target + event_type + full sentence
+GROUNDING_CACHE_KEY = os.getenv("GROUNDING_CACHE_KEY", "pair")
+GROUNDING_CACHE_SIZE = int(os.getenv("GROUNDING_CACHE_SIZE", 50_000))
+GROUNDING_CACHE_TTL_S = float(os.getenv("GROUNDING_CACHE_TTL_S", 30 * 24 * 3600))
+
+GROUNDING_CACHE = TieredCache(
+    "grounding",
+    max_size=GROUNDING_CACHE_SIZE,
+    ttl_s=GROUNDING_CACHE_TTL_S,
+    store=make_store(),
+)
+
+_WS_RE = re.compile(r"\s+")
 
 
 def _normalize_state_name(s: Optional[str]) -> Optional[str]:
@@ -20,15 +40,32 @@ def _normalize_state_name(s: Optional[str]) -> Optional[str]:
     return s
 
 
+def _normalize_key_part(s: Optional[str]) -> str:
+    return _WS_RE.sub(" ", (s or "").strip()).casefold()
+
+
 def _make_cache_key(
     actor: str,
     target: str,
     event_type: str,
     sentence_text: str,
+    model: str = "",
+    granularity: str = GROUNDING_CACHE_KEY,
 ) -> str:
-    blob = f"{actor}||{target}||{event_type}||{sentence_text}".encode(
-        "utf-8", errors="ignore"
-    )
+    if granularity == "pair":
+        parts = [_normalize_key_part(actor), _normalize_key_part(target)]
+    elif granularity == "event":
+        parts = [
+            _normalize_key_part(actor),
+            _normalize_key_part(target),
+            _normalize_key_part(event_type),
+        ]
+    elif granularity == "sentence":
+        parts = [actor, target, event_type, sentence_text]
+    else:
+        raise ValueError(f"Unknown grounding cache key granularity: {granularity}")
+
+    blob = "||".join([granularity, model, *parts]).encode("utf-8", errors="ignore")
     return hashlib.sha256(blob).hexdigest()
 
 
@@ -42,15 +79,38 @@ async def resolve_states(
     event_type: str,
     sentence_text: str,
     max_retries: int = 2,
+    gazetteer: Optional[Gazetteer] = None,
 ) -> Dict[str, Optional[str]]:
     """
     Pure async grounding function.
-    No DB access.
+    No DB access beyond the grounding cache.
+
+    Pairs the gazetteer resolves unambiguously skip the cache and LLM.
+    Cached answers are shared across sentences only for pairs naming a
+    state on each side; vague mentions are cached per sentence.
     """
 
-    key = _make_cache_key(actor, target, event_type, sentence_text)
-    if key in IN_MEMORY_CACHE:
-        return IN_MEMORY_CACHE[key]
+    if gazetteer is not None:
+        grounded = gazetteer.resolve_pair(actor, target)
+        if grounded is not None:
+            return grounded
+
+    anchored = (
+        gazetteer is not None
+        and gazetteer.anchor(actor) is not None
+        and gazetteer.anchor(target) is not None
+    )
+    key = _make_cache_key(
+        actor,
+        target,
+        event_type,
+        sentence_text,
+        client.model,
+        granularity=GROUNDING_CACHE_KEY if anchored else "sentence",
+    )
+    hit, cached = await GROUNDING_CACHE.aget(key)
+    if hit:
+        return cached
 
     prompt = build_prompt(actor, target, event_type, sentence_text)
 
@@ -63,7 +123,7 @@ async def resolve_states(
                 break
         except Exception:
             pass
-        time.sleep(0.2)
+        await asyncio.sleep(0.2)
 
     actor_state = _normalize_state_name(parsed.get("actor_state") if parsed else None)
     target_state = _normalize_state_name(parsed.get("target_state") if parsed else None)
@@ -79,5 +139,7 @@ async def resolve_states(
         "target_state": target_state,
     }
 
-    IN_MEMORY_CACHE[key] = result
+    # don't persist the fallback result of a failed LLM call
+    if isinstance(parsed, dict):
+        await GROUNDING_CACHE.aset(key, result)
     return result
@@ -1,6 +1,6 @@
 import json
 import re
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 _JSON_RE = re.compile(r"\{.*\}", re.DOTALL)
 
@@ -15,3 +15,30 @@ def extract_json_object(text: str) -> Optional[Dict]:
         return json.loads(m.group(0))
     except json.JSONDecodeError:
         return None
+
+
+_JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
+
+
+def extract_json_array(text: str) -> Optional[List]:
+    """
+    Extract a JSON array from LLM output.
+    Also accepts an object wrapping a single array (JSON mode output).
+    """
+    if not text:
+        return None
+    m = _JSON_ARRAY_RE.search(text.strip())
+    if m:
+        try:
+            value = json.loads(m.group(0))
+            if isinstance(value, list):
+                return value
+        except json.JSONDecodeError:
+            pass
+
+    obj = extract_json_object(text)
+    if isinstance(obj, dict):
+        arrays = [v for v in obj.values() if isinstance(v, list)]
+        if len(arrays) == 1:
+            return arrays[0]
+    return None
@@ -1,4 +1,5 @@
-from storage.db import get_connection
+from storage.db import get_connection, mark_events_materialized
+from storage.fingerprints import copy_canonical_rows
 from llm_actor_target_processing.extract import split_sentences
 
 
@@ -6,29 +7,57 @@ def initialize_actortargetevents(limit: int | None = None):
     """
     Create sentence-level rows in actortargetevents
     for events that are not yet materialized.
+
+    Work is found through the events.materialized_at watermark (partial
+    index), which is advanced in the same transaction as the inserts.
+
+    Near-duplicate events reuse their canonical event's rows (copied and
+    linked through source_row_id) instead of new sentences for the LLM.
+    A duplicate whose canonical is not materialized yet waits for it.
+
+    Selected events stay row-locked until the commit; concurrent callers
+    (LLM workers on other nodes) skip them instead of splitting them twice.
     """
 
     with get_connection() as conn:
         with conn.cursor() as cur:
+            # canonical events first, so a limited run can still copy them
             cur.execute(
                 """
-                SELECT event_id, text_processed
-                FROM events
-                WHERE text_processed IS NOT NULL
-                  AND event_id NOT IN (
-                      SELECT DISTINCT event_id FROM actortargetevents
-                  )
+                SELECT ev.event_id, ev.text_processed, ev.created_at, fp.canonical_event_id
+                FROM events ev
+                LEFT JOIN event_fingerprints fp ON fp.event_id = ev.event_id::text
+                WHERE ev.materialized_at IS NULL
+                  AND ev.text_processed IS NOT NULL
+                ORDER BY (fp.canonical_event_id IS NOT NULL)
                 """
-                + (" LIMIT %s" if limit else ""),
+                + (" LIMIT %s" if limit else "")
+                + " FOR UPDATE OF ev SKIP LOCKED",
                 (limit,) if limit else None,
             )
 
             events = cur.fetchall()
 
+            canonical_ids = {canonical_id for _, _, _, canonical_id in events if canonical_id}
+            ready = set()
+            if canonical_ids:
+                cur.execute(
+                    """
+                    SELECT event_id::text FROM events
+                    WHERE event_id IN %s AND materialized_at IS NOT NULL
+                    """,
+                    (tuple(canonical_ids),),
+                )
+                ready = {event_id for (event_id,) in cur.fetchall()}
+
         inserted = 0
+        copied = 0
+        materialized = []
 
         with conn.cursor() as cur:
-            for event_id, text in events:
+            for event_id, text, created_at, canonical_id in events:
+                if canonical_id:
+                    continue
                 sentences = split_sentences(text)
 
                 for idx, sentence in enumerate(sentences):
@@ -38,15 +67,29 @@ def initialize_actortargetevents(limit: int | None = None):
                             event_id,
                             sentence_index,
                             sentence_text,
-                            states_resolved
+                            states_resolved,
+                            created_at
                         )
-                        VALUES (%s, %s, %s, FALSE)
+                        VALUES (%s, %s, %s, FALSE, %s::timestamptz)
                         ON CONFLICT DO NOTHING;
                         """,
-                        (event_id, idx, sentence),
+                        (event_id, idx, sentence, created_at),
                     )
                     inserted += 1
+                materialized.append(event_id)
+                ready.add(str(event_id))
+
+            deferred = 0
+            for event_id, _, _, canonical_id in events:
+                if not canonical_id:
+                    continue
+                if canonical_id not in ready:
+                    deferred += 1
+                    continue
+                copied += copy_canonical_rows(cur, event_id, canonical_id)
+                materialized.append(event_id)
 
+        mark_events_materialized(conn, materialized)
         conn.commit()
 
-    return {"inserted": inserted}
+    return {"inserted": inserted, "copied": copied, "deferred_duplicates": deferred}
@@ -1,23 +1,165 @@
 import os
+import json
+import shutil
 import asyncio
-from typing import Optional
+from typing import Optional, Dict, Any
+
+try:
+    import httpx
+except ImportError:  # HTTP transport unavailable, subprocess only
+    httpx = None
+
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+
+# "http" talks to the Ollama server, "cli" forks `ollama run` per prompt
+OLLAMA_TRANSPORT = os.getenv("OLLAMA_TRANSPORT", "http")
+
+# How long the server keeps the model loaded between requests
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "10m")
+
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", 16))
+
+# Retries (with exponential backoff from OLLAMA_CONNECT_BACKOFF_S) when the
+# server is unreachable, e.g. during an Ollama restart
+OLLAMA_CONNECT_RETRIES = int(os.getenv("OLLAMA_CONNECT_RETRIES", 3))
+OLLAMA_CONNECT_BACKOFF_S = float(os.getenv("OLLAMA_CONNECT_BACKOFF_S", 0.5))
+
+
+# One pooled HTTP client per (event loop, base url), shared by all
+# OllamaClients; each request carries its client's own timeout
+_HTTP_CLIENTS: Dict[tuple, "httpx.AsyncClient"] = {}
+
+
+def _get_http_client(base_url: str) -> "httpx.AsyncClient":
+    key = (id(asyncio.get_running_loop()), base_url)
+    http = _HTTP_CLIENTS.get(key)
+    if http is None or http.is_closed:
+        http = httpx.AsyncClient(
+            base_url=base_url,
+            limits=httpx.Limits(
+                max_connections=OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=OLLAMA_MAX_CONNECTIONS,
+            ),
+        )
+        _HTTP_CLIENTS[key] = http
+    return http
+
+
+async def close_http_clients():
+    """Close pooled HTTP connections (call on app shutdown)."""
+    loop_id = id(asyncio.get_running_loop())
+    for key in [k for k in _HTTP_CLIENTS if k[0] == loop_id]:
+        await _HTTP_CLIENTS.pop(key).aclose()
 
 
 class OllamaClient:
     """
-    Async wrapper around `ollama run <model>`.
-    Central place for retries/timeouts later.
+    Async wrapper around a local Ollama model.
+
+    Default transport is the Ollama HTTP API (/api/generate) over a
+    shared keep-alive connection pool. `ollama run <model>` is used when
+    httpx is missing, and for a single prompt when the server stays
+    unreachable through OLLAMA_CONNECT_RETRIES retries and the `ollama`
+    binary is installed; the next prompt tries HTTP again.
     """
 
-    def __init__(self, model: Optional[str] = None, timeout_s: int = 60):
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        timeout_s: int = 60,
+        *,
+        base_url: Optional[str] = None,
+        transport: Optional[str] = None,
+        stream: bool = False,
+        json_mode: bool = False,
+        options: Optional[Dict[str, Any]] = None,
+    ):
         self.model = model or os.getenv("OLLAMA_MODEL", "mistral:instruct")
         self.timeout_s = timeout_s
+        self.base_url = (base_url or OLLAMA_BASE_URL).rstrip("/")
+        self.transport = transport or OLLAMA_TRANSPORT
+        self.stream = stream
+        self.json_mode = json_mode
+        self.options = options or {}
+
+        if self.transport == "http" and httpx is None:
+            print("[llm] httpx not installed, using `ollama run` transport")
+            self.transport = "cli"
 
-    async def run(self, prompt: str) -> str:
+    async def run(self, prompt: str, *, json_mode: Optional[bool] = None) -> str:
         prompt = (prompt or "").strip()
         if not prompt:
             return ""
 
+        if self.transport != "http":
+            return await self._run_cli(prompt)
+
+        json_mode = self.json_mode if json_mode is None else json_mode
+        delay = OLLAMA_CONNECT_BACKOFF_S
+        for attempt in range(OLLAMA_CONNECT_RETRIES + 1):
+            try:
+                return await self._run_http(prompt, json_mode)
+            except httpx.ConnectError as e:
+                error = e
+            if attempt < OLLAMA_CONNECT_RETRIES:
+                await asyncio.sleep(delay)
+                delay *= 2
+
+        if shutil.which("ollama") is None:
+            raise RuntimeError(f"Ollama server unreachable: {error}")
+        print(f"[llm] Ollama server unreachable ({error}), using `ollama run` for this prompt")
+        return await self._run_cli(prompt)
+
+    # -------------------------
+    # HTTP transport
+    # -------------------------
+    def _payload(self, prompt: str, json_mode: bool) -> Dict[str, Any]:
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": self.stream,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+        }
+        if json_mode:
+            payload["format"] = "json"
+        if self.options:
+            payload["options"] = self.options
+        return payload
+
+    async def _run_http(self, prompt: str, json_mode: bool) -> str:
+        http = _get_http_client(self.base_url)
+        payload = self._payload(prompt, json_mode)
+
+        try:
+            if not self.stream:
+                resp = await http.post("/api/generate", json=payload, timeout=self.timeout_s)
+                _raise_for_status(resp)
+                return (resp.json().get("response") or "").strip()
+
+            chunks = []
+            async with http.stream("POST", "/api/generate", json=payload, timeout=self.timeout_s) as resp:
+                if resp.status_code >= 400:
+                    await resp.aread()
+                    _raise_for_status(resp)
+                async for line in resp.aiter_lines():
+                    if not line:
+                        continue
+                    part = json.loads(line)
+                    if part.get("error"):
+                        raise RuntimeError(part["error"])
+                    chunks.append(part.get("response") or "")
+                    if part.get("done"):
+                        break
+            return "".join(chunks).strip()
+
+        except httpx.TimeoutException:
+            raise RuntimeError("LLM timeout")
+
+    # -------------------------
+    # Subprocess transport (fallback)
+    # -------------------------
+    async def _run_cli(self, prompt: str) -> str:
         proc = await asyncio.create_subprocess_exec(
             "ollama",
             "run",
@@ -40,3 +182,13 @@ class OllamaClient:
             raise RuntimeError((stderr or b"").decode("utf-8", errors="ignore").strip())
 
         return (stdout or b"").decode("utf-8", errors="ignore").strip()
+
+
+def _raise_for_status(resp: "httpx.Response"):
+    if resp.status_code < 400:
+        return
+    try:
+        detail = resp.json().get("error")
+    except ValueError:
+        detail = None
+    raise RuntimeError(detail or f"Ollama HTTP {resp.status_code}")
@@ -1,9 +1,20 @@
-from typing import Optional
-from storage.db import get_connection
+import os
+import asyncio
+from typing import Optional, Tuple, List, Dict
+from storage.db import get_connection, run_db
+from storage.write_buffer import ActorTargetWriteBuffer
+from storage.aggregates import add_to_relation_aggregates
+from storage.fingerprints import propagate_to_linked_rows
 
 from llm_actor_target_processing.row_selectors import select_rows, ProcessingMode
-from llm_actor_target_processing.extract import extract_actor_target_from_text
-from llm_actor_target_processing.ground import resolve_states
+from llm_actor_target_processing.extract import (
+    extract_actor_target_from_text,
+    extract_sentences_batch,
+    EXTRACTION_CACHE,
+)
+from llm_actor_target_processing.ground import resolve_states, GROUNDING_CACHE
+from llm_actor_target_processing.gazetteer import Gazetteer
+from llm_actor_target_processing.relevance import RelevanceFilter, RELEVANCE_THRESHOLD
 from llm_actor_target_processing.llm_client import OllamaClient
 from llm_actor_target_processing.initializer import (
     initialize_actortargetevents,
@@ -24,11 +35,13 @@ def update_extraction(
                 UPDATE actortargetevents
                 SET actor = %s,
                     target = %s,
-                    event_type = %s
+                    event_type = %s,
+                    no_event = (COALESCE(%s, '') = '' OR COALESCE(%s, '') = '' OR COALESCE(%s, '') = '')
                 WHERE id = %s;
                 """,
-                (actor, target, event_type, row_id),
+                (actor, target, event_type, actor, target, event_type, row_id),
             )
+            propagate_to_linked_rows(cur, [row_id])
         conn.commit()
 
 
@@ -50,122 +63,383 @@ def update_grounding(
                     actor_state_iso3 = %s,
                     target_state_iso3 = %s,
                     states_resolved = TRUE
-                WHERE id = %s;
+                WHERE id = %s
+                  AND states_resolved = FALSE
+                RETURNING id;
                 """,
                 (actor_state, target_state, actor_state_iso3, target_state_iso3, row_id),
             )
+            # first grounding of this row: count it in relation_daily
+            if cur.fetchone() is not None:
+                add_to_relation_aggregates(cur, [row_id])
+            propagate_to_linked_rows(cur, [row_id])
+        conn.commit()
+
+
+def load_states() -> List[Tuple[str, str]]:
+    """(name, iso3) for every state"""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT name, iso3 FROM states;")
+            return cur.fetchall()
+
+
+def update_relevance(*, skipped_ids: List[int], passed_ids: List[int], signature: str):
+    """
+    Record pre-filter outcomes; skipped rows are left out of later runs
+    until the filter `signature` changes (see reset_stale_relevance).
+    """
+    if not skipped_ids and not passed_ids:
+        return
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE actortargetevents
+                SET relevance_skipped = (id = ANY(%s)),
+                    relevance_filter = CASE WHEN id = ANY(%s) THEN %s END
+                WHERE id = ANY(%s);
+                """,
+                (skipped_ids, skipped_ids, signature, skipped_ids + passed_ids),
+            )
         conn.commit()
 
 
+def reset_stale_relevance(signature: str) -> int:
+    """Make rows skipped under another filter rule/threshold eligible again."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE actortargetevents
+                SET relevance_skipped = FALSE,
+                    relevance_filter = NULL
+                WHERE relevance_skipped
+                  AND relevance_filter IS DISTINCT FROM %s;
+                """,
+                (signature,),
+            )
+            reset = cur.rowcount
+        conn.commit()
+    if reset:
+        print(f"[processor] {reset} rows skipped under another relevance filter will be re-scored")
+    return reset
+
+
+# Number of rows processed concurrently (LLM requests in flight)
+DEFAULT_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", 4))
+
+# Sentences packed into one extraction prompt (1 = one prompt per sentence)
+DEFAULT_EXTRACT_BATCH_SIZE = int(os.getenv("LLM_EXTRACT_BATCH_SIZE", 1))
+
+_NOT_PREFETCHED = object()
+
+
+async def process_row(
+    row: Tuple,
+    *,
+    client: OllamaClient,
+    states_list: List[str],
+    states_set: set,
+    states_iso_map: Dict[str, str],
+    gazetteer: Optional[Gazetteer] = None,
+    writer: Optional[ActorTargetWriteBuffer] = None,
+    extracted_row=_NOT_PREFETCHED,
+):
+    """
+    Extraction then grounding for a single actortargetevents row.
+    `extracted_row` carries a result already obtained by a batched
+    extraction call (None meaning "no event").
+    Updates go through `writer` when given, else straight to the DB
+    (on the DB thread pool).
+    """
+    (
+        row_id,
+        event_id,
+        sentence_index,
+        sentence_text,
+        actor,
+        target,
+        event_type,
+        actor_state,
+        target_state,
+        states_resolved,
+    ) = row
+    print(f"[row {row_id}] actor={actor}, target={target}, event_type={event_type}")
+
+    # ---- EXTRACTION (if missing) ----
+    if actor is None or target is None or event_type is None:
+        if extracted_row is _NOT_PREFETCHED:
+            print(f"[row {row_id}] running extraction")
+            extracted = await extract_actor_target_from_text(
+                event_id=event_id,
+                text=sentence_text,
+                client=client,
+            )
+        else:
+            extracted = [extracted_row] if extracted_row else []
+
+        # extraction returns list, but here we process ONE sentence
+        if extracted:
+            _, _, _, actor, target, event_type = extracted[0]
+        else:
+            actor = target = event_type = None
+
+        # an incomplete result is stored too: it marks the row "no event"
+        extraction = dict(row_id=row_id, actor=actor, target=target, event_type=event_type)
+        if writer:
+            await writer.add_extraction(**extraction)
+        else:
+            await run_db(update_extraction, **extraction)
+        # Update local variables so grounding can run in same iteration
+        print(f"[row {row_id}] extracted: actor={actor}, target={target}, event_type={event_type}")
+
+    # ---- GROUNDING (if missing) ----
+    print(
+        f"[row {row_id}] states_resolved={states_resolved}, actor={actor}, target={target}"
+    )
+    if not states_resolved and actor and target and event_type:
+        print(f"[row {row_id}] running grounding")
+        grounded = await resolve_states(
+            client=client,
+            states_list=states_list,
+            states_set=states_set,
+            actor=actor,
+            target=target,
+            event_type=event_type,
+            sentence_text=sentence_text,
+            gazetteer=gazetteer,
+        )
+
+        # Look up ISO3 codes from the state names
+        actor_state = grounded["actor_state"]
+        target_state = grounded["target_state"]
+        actor_state_iso3 = states_iso_map.get(actor_state) if actor_state else None
+        target_state_iso3 = states_iso_map.get(target_state) if target_state else None
+
+        grounding = dict(
+            row_id=row_id,
+            actor_state=actor_state,
+            target_state=target_state,
+            actor_state_iso3=actor_state_iso3,
+            target_state_iso3=target_state_iso3,
+        )
+        if writer:
+            await writer.add_grounding(**grounding)
+        else:
+            await run_db(update_grounding, **grounding)
+        print(f"[row {row_id}] grounded: actor_state={actor_state} ({actor_state_iso3}), target_state={target_state} ({target_state_iso3})")
+
+
+def _needs_extraction(row: Tuple) -> bool:
+    return row[4] is None or row[5] is None or row[6] is None
+
+
+async def process_rows(
+    rows: List[Tuple],
+    *,
+    client: OllamaClient,
+    states_list: List[str],
+    states_set: set,
+    states_iso_map: Dict[str, str],
+    gazetteer: Optional[Gazetteer] = None,
+    writer: Optional[ActorTargetWriteBuffer] = None,
+    extract_batch_size: int = 1,
+    errors: Optional[Dict[int, str]] = None,
+):
+    """
+    Process a chunk of rows: one batched extraction call for the rows
+    missing extraction, then per-row grounding in order.
+    With `errors` given (worker mode), a row that raises is recorded
+    there (row id -> error) and the other rows still run; a failed
+    batched extraction falls back to per-row calls. Without it the
+    first error is raised.
+    """
+    prefetched = {}
+    pending = [row for row in rows if _needs_extraction(row)]
+    if extract_batch_size > 1 and len(pending) > 1:
+        print(f"[processor] batched extraction of {len(pending)} rows")
+        try:
+            results = await extract_sentences_batch(
+                [(row[1], row[2], row[3]) for row in pending],
+                client,
+            )
+            prefetched = {row[0]: result for row, result in zip(pending, results)}
+        except Exception as e:
+            if errors is None:
+                raise
+            print(f"[processor] batched extraction failed, extracting rows one by one: {e}")
+
+    for row in rows:
+        try:
+            await process_row(
+                row,
+                client=client,
+                states_list=states_list,
+                states_set=states_set,
+                states_iso_map=states_iso_map,
+                gazetteer=gazetteer,
+                writer=writer,
+                extracted_row=prefetched.get(row[0], _NOT_PREFETCHED),
+            )
+        except Exception as e:
+            if errors is None:
+                raise
+            print(f"[row {row[0]}] failed: {e}")
+            errors[row[0]] = f"{type(e).__name__}: {e}"
+
+
+async def load_grounding_context() -> Dict:
+    """States whitelist, name -> ISO3 map and gazetteer for one run."""
+    states_data = await run_db(load_states)
+    states_list = [name for name, _ in states_data]
+    return {
+        "states_list": states_list,
+        "states_set": set(states_list),
+        "states_iso_map": {name: iso3 for name, iso3 in states_data},
+        # Alias index for deterministic grounding of obvious states
+        "gazetteer": Gazetteer(states_data),
+    }
+
+
+async def filter_relevant(rows: List[Tuple], relevance: RelevanceFilter) -> List[Tuple]:
+    """Record and drop the rows still to extract that `relevance` rejects."""
+    skipped_ids, passed_ids = [], []
+    for row in rows:
+        if _needs_extraction(row):
+            (passed_ids if relevance.is_relevant(row[3]) else skipped_ids).append(row[0])
+    await run_db(
+        update_relevance,
+        skipped_ids=skipped_ids,
+        passed_ids=passed_ids,
+        signature=relevance.signature,
+    )
+    if not skipped_ids:
+        return rows
+    skipped = set(skipped_ids)
+    return [row for row in rows if row[0] not in skipped]
+
+
 async def process(
     *,
     mode: ProcessingMode,
     limit: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    extract_batch_size: Optional[int] = None,
+    relevance_threshold: Optional[float] = None,
+    progress: Optional[Dict] = None,
 ):
     """
     Unified LLM processing pipeline.
 
     - Initializes new rows from events table
     - Selects rows based on mode
+    - Skips rows the relevance pre-filter rejects (see RelevanceFilter)
     - Runs extraction if missing
     - Runs grounding if missing
     - Updates DB
+
+    Rows are handled by `concurrency` asyncio workers pulling from a
+    shared queue; each row still runs extraction before grounding.
+    Every DB call runs on the DB thread pool, never on the event loop.
+    Workers take `extract_batch_size` rows at a time and extract them
+    with a single prompt. Counters are kept up to date in `progress`
+    when given (saved by the job heartbeat).
     """
-    
+    progress = progress if progress is not None else {}
+    concurrency = max(1, concurrency or DEFAULT_CONCURRENCY)
+    extract_batch_size = max(1, extract_batch_size or DEFAULT_EXTRACT_BATCH_SIZE)
+
     # Step 1: Initialize new rows from events table
     print("[processor] initializing new rows from events table...")
-    init_result = initialize_actortargetevents(limit=limit)
-    print(f"[processor] initialized {init_result['inserted']} new rows")
+    init_result = await run_db(initialize_actortargetevents, limit=limit)
+    print(
+        f"[processor] initialized {init_result['inserted']} new rows, "
+        f"copied {init_result['copied']} from near-duplicate canonicals"
+    )
 
     client = OllamaClient()
 
+    for cache in (EXTRACTION_CACHE, GROUNDING_CACHE):
+        purged = await run_db(cache.purge_expired)
+        if purged:
+            print(f"[processor] purged {purged} expired {cache.namespace} cache entries")
+
+    relevance = RelevanceFilter(
+        threshold=RELEVANCE_THRESHOLD if relevance_threshold is None else relevance_threshold,
+    )
+    await run_db(reset_stale_relevance, relevance.signature)
+
     # Step 2: Select rows to process
-    rows = select_rows(mode=mode, limit=limit)
+    rows = await run_db(select_rows, mode=mode, limit=limit)
     print(f"[processor] selected {len(rows)} rows")
+    progress["selected"] = len(rows)
 
     if not rows:
         return {"processed": 0}
 
     # load states whitelist ONCE per run
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT name, iso3 FROM states;")
-            states_data = cur.fetchall()
-    
-    states_list = [name for name, _ in states_data]
-    states_set = set(states_list)
-    # Create name -> ISO3 mapping
-    states_iso_map = {name: iso3 for name, iso3 in states_data}
+    context = await load_grounding_context()
+    states_list = context["states_list"]
+    states_set = context["states_set"]
+    states_iso_map = context["states_iso_map"]
+    gazetteer = context["gazetteer"]
 
-    processed = 0
+    # Step 3: drop clearly irrelevant sentences before any LLM call
+    relevance.gazetteer = gazetteer
+    rows = await filter_relevant(rows, relevance)
+    relevance_stats = relevance.snapshot()
+    progress["relevance_filtered"] = relevance_stats["filtered"]
+    print(f"[processor] relevance pre-filter: {relevance_stats}")
 
-    for (
-        row_id,
-        event_id,
-        sentence_index,
-        sentence_text,
-        actor,
-        target,
-        event_type,
-        actor_state,
-        target_state,
-        states_resolved,
-    ) in rows:
-        print(f"[row {row_id}] actor={actor}, target={target}, event_type={event_type}")
+    queue: asyncio.Queue = asyncio.Queue()
+    for row in rows:
+        queue.put_nowait(row)
 
-        # ---- EXTRACTION (if missing) ----
-        if actor is None or target is None or event_type is None:
-            print(f"[row {row_id}] running extraction")
-            extracted = await extract_actor_target_from_text(
-                event_id=event_id,
-                text=sentence_text,
-                client=client,
-            )
+    processed = 0
 
-            # extraction returns list, but here we process ONE sentence
-            if extracted:
-                _, _, _, actor, target, event_type = extracted[0]
-
-                update_extraction(
-                    row_id=row_id,
-                    actor=actor,
-                    target=target,
-                    event_type=event_type,
-                )
-                # Update local variables so grounding can run in same iteration
-                print(f"[row {row_id}] extracted: actor={actor}, target={target}, event_type={event_type}")
-
-        # ---- GROUNDING (if missing) ----
-        print(
-            f"[row {row_id}] states_resolved={states_resolved}, actor={actor}, target={target}"
-        )
-        if not states_resolved and actor and target and event_type:
-            print(f"[row {row_id}] running grounding")
-            grounded = await resolve_states(
+    async def worker():
+        nonlocal processed
+        while not queue.empty():
+            chunk = []
+            while len(chunk) < extract_batch_size and not queue.empty():
+                chunk.append(queue.get_nowait())
+            await process_rows(
+                chunk,
                 client=client,
                 states_list=states_list,
                 states_set=states_set,
-                actor=actor,
-                target=target,
-                event_type=event_type,
-                sentence_text=sentence_text,
+                states_iso_map=states_iso_map,
+                gazetteer=gazetteer,
+                writer=writer,
+                extract_batch_size=extract_batch_size,
             )
+            processed += len(chunk)
+            progress["processed"] = processed
 
-            # Look up ISO3 codes from the state names
-            actor_state = grounded["actor_state"]
-            target_state = grounded["target_state"]
-            actor_state_iso3 = states_iso_map.get(actor_state) if actor_state else None
-            target_state_iso3 = states_iso_map.get(target_state) if target_state else None
-
-            update_grounding(
-                row_id=row_id,
-                actor_state=actor_state,
-                target_state=target_state,
-                actor_state_iso3=actor_state_iso3,
-                target_state_iso3=target_state_iso3,
-            )
-            print(f"[row {row_id}] grounded: actor_state={actor_state} ({actor_state_iso3}), target_state={target_state} ({target_state_iso3})")
+    n_workers = min(concurrency, len(rows))
+    print(f"[processor] running {n_workers} workers")
+    # results are flushed in bulk; exiting the block always flushes the rest
+    async with ActorTargetWriteBuffer() as writer:
+        workers = [asyncio.create_task(worker()) for _ in range(n_workers)]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for w in workers:
+                w.cancel()
+            raise
 
-        processed += 1
+    extraction_cache_stats = EXTRACTION_CACHE.snapshot()
+    cache_stats = GROUNDING_CACHE.snapshot()
+    gazetteer_stats = gazetteer.snapshot()
+    print(f"[processor] extraction cache: {extraction_cache_stats}")
+    print(f"[processor] grounding cache: {cache_stats}")
+    print(f"[processor] gazetteer: {gazetteer_stats}")
 
-    return {"processed": processed}
+    return {
+        "processed": processed,
+        "relevance": relevance_stats,
+        "extraction_cache": extraction_cache_stats,
+        "grounding_cache": cache_stats,
+        "gazetteer": gazetteer_stats,
+    }
@@ -1,3 +1,52 @@
+EVENT_TYPES = [
+    "ATTACK",
+    "THREAT",
+    "COERCIVE_ACTION",
+    "DIPLOMATIC_ACTION",
+    "PROTEST",
+    "CYBER_OPERATION",
+    "TERRORISM",
+]
+
+# Word stems typical of each event type (matched at word starts,
+# lowercase). Used by the relevance pre-filter, not sent to the LLM.
+EVENT_KEYWORDS = {
+    "ATTACK": [
+        "attack", "strike", "struck", "airstrike", "bomb", "shell", "missile",
+        "rocket", "drone", "artillery", "offensive", "invade", "invasion",
+        "raid", "shoot", "shot", "fire", "killed", "kill", "wound", "troops",
+        "assault", "clash", "intercept", "shot down", "explosion", "casualt",
+    ],
+    "THREAT": [
+        "threat", "threaten", "warn", "ultimatum", "retaliat", "vow",
+        "mobiliz", "escalat", "red line", "nuclear", "deploy", "drill",
+    ],
+    "COERCIVE_ACTION": [
+        "sanction", "tariff", "embargo", "arms sale", "weapons", "aid",
+        "funding", "freeze", "blockade", "ban", "expel", "seize", "export control",
+        "restrict", "boycott",
+    ],
+    "DIPLOMATIC_ACTION": [
+        "agree", "agreement", "treaty", "accord", "deal", "summit", "talks",
+        "negotiat", "ceasefire", "truce", "memorandum", "mou", "ambassador",
+        "embassy", "minister", "diplomat", "envoy", "visit", "meet", "recogni",
+        "alliance", "pact", "peace",
+    ],
+    "PROTEST": [
+        "protest", "demonstrat", "rally", "riot", "unrest", "march",
+        "strike action", "dissent", "crackdown",
+    ],
+    "CYBER_OPERATION": [
+        "cyber", "hack", "ransomware", "malware", "ddos", "breach",
+        "phishing", "espionage", "spyware",
+    ],
+    "TERRORISM": [
+        "terror", "suicide bomb", "hostage", "kidnap", "militant", "jihad",
+        "extremist", "insurgent", "gunmen",
+    ],
+}
+
+
 def build_prompt(sentence_text: str) -> str:
     """
     Build prompt for actor-target extraction from a sentence.
@@ -7,7 +56,7 @@ def build_prompt(sentence_text: str) -> str:
 Rules:
 - Identify the ACTOR (who is acting)
 - Identify the TARGET (who/what is being acted upon)
-- Classify the EVENT_TYPE from: ATTACK, THREAT, COERCIVE_ACTION, DIPLOMATIC_ACTION, PROTEST, CYBER_OPERATION, TERRORISM
+- Classify the EVENT_TYPE from: {', '.join(EVENT_TYPES)}
 - If no clear event, return "UNDEFINED" for event_type
 - Output VALID JSON ONLY with keys: actor, target, event
 
@@ -20,3 +69,29 @@ Return JSON:
   "event": "..."
 }}
 """.strip()
+
+
+def build_batch_prompt(sentences: list) -> str:
+    """
+    Build one prompt for actor-target extraction from several sentences.
+    The model must answer with a JSON array indexed by sentence number.
+    """
+    numbered = "\n".join(f"{i}. {s}" for i, s in enumerate(sentences))
+    return f"""Extract geopolitical actor-target relations from each numbered sentence.
+
+Rules:
+- Identify the ACTOR (who is acting)
+- Identify the TARGET (who/what is being acted upon)
+- Classify the EVENT_TYPE from: {', '.join(EVENT_TYPES)}
+- If no clear event, return "UNDEFINED" for event_type
+- Return exactly one object per sentence, using the sentence number as "index"
+- Output a VALID JSON ARRAY ONLY with keys: index, actor, target, event
+
+Sentences:
+{numbered}
+
+Return JSON:
+[
+  {{"index": 0, "actor": "...", "target": "...", "event": "..."}}
+]
+""".strip()
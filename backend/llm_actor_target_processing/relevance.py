@@ -0,0 +1,118 @@
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from llm_actor_target_processing.gazetteer import Gazetteer, normalize_text
+from llm_actor_target_processing.prompts_extract import EVENT_KEYWORDS
+
+
+# Optional score cutoff on top of the default rule (0 = rule only).
+# Raise it to trade recall for throughput.
+RELEVANCE_THRESHOLD = float(os.getenv("RELEVANCE_THRESHOLD", 0))
+# Sentences with fewer words count as fragments
+RELEVANCE_MIN_TOKENS = int(os.getenv("RELEVANCE_MIN_TOKENS", 4))
+# Bump when the rule or weights change: rows skipped under another
+# version / threshold are re-scored by the next run
+RELEVANCE_RULES_VERSION = 2
+
+# Channel boilerplate and off-topic beats (stems; keep clear of words
+# that also describe conflict, e.g. "goal", "score", "match")
+NOISE_KEYWORDS = [
+    "subscribe", "follow us", "join us", "join our", "our channel", "link in bio",
+    "click", "advertis", "promo", "discount", "giveaway", "donate",
+    "weather", "forecast", "temperature", "sunny",
+    "football", "soccer", "tournament", "championship",
+    "horoscope", "recipe",
+]
+
+KEYWORD_WEIGHT = 1.0
+ENTITY_WEIGHT = 0.5
+NOISE_WEIGHT = -1.0
+
+
+def _stems_pattern(stems: List[str]) -> re.Pattern:
+    alternation = "|".join(sorted((re.escape(s) for s in stems), key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})\w*")
+
+
+_EVENT_PATTERNS = {
+    event_type: _stems_pattern(stems) for event_type, stems in EVENT_KEYWORDS.items()
+}
+_NOISE_PATTERN = _stems_pattern(NOISE_KEYWORDS)
+
+
+class RelevanceFilter:
+    """
+    Cheap local scorer run before extraction.
+
+    By default a sentence is skipped only when it has no event keyword
+    and no state mention and is either a fragment (< RELEVANCE_MIN_TOKENS
+    words) or contains boilerplate/off-topic words. With a positive
+    `threshold` the remaining sentences must also reach
+
+        score = KEYWORD_WEIGHT per distinct event keyword
+              + ENTITY_WEIGHT when a state alias is mentioned
+              + NOISE_WEIGHT per boilerplate/off-topic keyword
+    """
+
+    def __init__(
+        self,
+        threshold: float = RELEVANCE_THRESHOLD,
+        gazetteer: Optional[Gazetteer] = None,
+    ):
+        self.threshold = threshold
+        self.gazetteer = gazetteer
+        self.stats = {"passed": 0, "filtered": 0}
+
+    @property
+    def signature(self) -> str:
+        """Stored on skipped rows; a different one makes them eligible again."""
+        return f"v{RELEVANCE_RULES_VERSION}:{self.threshold:g}"
+
+    def _features(self, norm: str) -> Tuple[int, Optional[str], bool, int]:
+        """(event keyword hits, best event type, state mentioned, noise hits)"""
+        keyword_hits = 0
+        best_type, best_hits = None, 0
+        for event_type, pattern in _EVENT_PATTERNS.items():
+            hits = len(set(pattern.findall(norm)))
+            keyword_hits += hits
+            if hits > best_hits:
+                best_type, best_hits = event_type, hits
+
+        has_state = False
+        if self.gazetteer is not None:
+            has_state = next(self.gazetteer.automaton.iter_matches(f" {norm} "), None) is not None
+
+        return keyword_hits, best_type, has_state, len(_NOISE_PATTERN.findall(norm))
+
+    def score(self, sentence_text: Optional[str]) -> Tuple[float, Optional[str]]:
+        """(score, most likely event type or None)"""
+        keyword_hits, best_type, has_state, noise_hits = self._features(
+            normalize_text(sentence_text)
+        )
+        score = (
+            KEYWORD_WEIGHT * keyword_hits
+            + (ENTITY_WEIGHT if has_state else 0.0)
+            + NOISE_WEIGHT * noise_hits
+        )
+        return score, best_type
+
+    def is_relevant(self, sentence_text: Optional[str]) -> bool:
+        norm = normalize_text(sentence_text)
+        keyword_hits, _, has_state, noise_hits = self._features(norm)
+        if keyword_hits or has_state:
+            relevant = True
+        else:
+            relevant = len(norm.split()) >= RELEVANCE_MIN_TOKENS and not noise_hits
+        if relevant and self.threshold > 0:
+            relevant = self.score(sentence_text)[0] >= self.threshold
+        self.stats["passed" if relevant else "filtered"] += 1
+        return relevant
+
+    def snapshot(self) -> Dict[str, object]:
+        total = self.stats["passed"] + self.stats["filtered"]
+        return {
+            **self.stats,
+            "threshold": self.threshold,
+            "filtered_ratio": round(self.stats["filtered"] / total, 4) if total else None,
+        }
@@ -1,4 +1,6 @@
-from typing import Literal, Optional, List, Tuple
+import os
+from datetime import datetime
+from typing import Literal, Optional, Dict, List, Tuple, get_args
 from storage.db import get_connection
 
 ProcessingMode = Literal[
@@ -8,17 +10,19 @@ ProcessingMode = Literal[
     "missing_states",
 ]
 
+# Modes that shrink as rows are processed, so workers can drain them
+WorkerMode = Literal[
+    "missing_extraction",
+    "missing_states",
+]
 
-def select_rows(
-    *,
-    mode: ProcessingMode,
-    limit: Optional[int] = None,
-) -> List[Tuple]:
-    """
-    Returns rows from actortargetevents depending on mode.
+# Seconds a worker owns the rows it claimed without renewing them; after
+# that (crashed or stuck worker) they are claimable again
+ROW_CLAIM_LEASE_S = float(os.getenv("ROW_CLAIM_LEASE_S", 300))
+# Runs in which a row may fail before workers stop claiming it
+ROW_MAX_FAILURES = int(os.getenv("ROW_MAX_FAILURES", 3))
 
-    Row format (fixed):
-    (
+_COLUMNS = """
         id,
         event_id,
         sentence_index,
@@ -28,12 +32,34 @@ def select_rows(
         event_type,
         actor_state,
         target_state,
-        states_resolved,
-    )
+        states_resolved
+"""
+
+# rows copied from a near-duplicate's canonical event are never processed;
+# rows the relevance pre-filter skipped are only revisited by all/last_n
+_OWN_ROWS = "source_row_id IS NULL"
+
+_MODE_FILTERS = {
+    "all": _OWN_ROWS,
+    "last_n": _OWN_ROWS,
+    "missing_extraction": (
+        f"{_OWN_ROWS} AND relevance_skipped = FALSE "
+        "AND (actor IS NULL OR target IS NULL OR event_type IS NULL)"
+    ),
+    "missing_states": f"{_OWN_ROWS} AND relevance_skipped = FALSE AND states_resolved = FALSE",
+}
+
+
+def select_rows(
+    *,
+    mode: ProcessingMode,
+    limit: Optional[int] = None,
+) -> List[Tuple]:
     """
+    Returns rows from actortargetevents depending on mode.
 
-    base_select = """
-    SELECT
+    Row format (fixed):
+    (
         id,
         event_id,
         sentence_index,
@@ -43,33 +69,24 @@ def select_rows(
         event_type,
         actor_state,
         target_state,
-        states_resolved
-    FROM actortargetevents
+        states_resolved,
+    )
     """
 
-    if mode == "all":
-        where = ""
-        order = "ORDER BY id"
-
-    elif mode == "last_n":
-        where = ""
-        order = "ORDER BY id DESC"
-
-    elif mode == "missing_extraction":
-        where = "WHERE actor IS NULL OR target IS NULL OR event_type IS NULL"
-        order = "ORDER BY id"
-
-    elif mode == "missing_states":
-        where = "WHERE states_resolved = FALSE"
-        order = "ORDER BY id"
-
-    else:
+    if mode not in _MODE_FILTERS:
         raise ValueError(f"Unknown mode: {mode}")
+    # rows a live worker has claimed are left to it
+    where = (
+        f"WHERE {_MODE_FILTERS[mode]} "
+        "AND (claimed_until IS NULL OR claimed_until < NOW())"
+    )
+    order = "ORDER BY id DESC" if mode == "last_n" else "ORDER BY id"
 
     limit_clause = f"LIMIT {limit}" if limit else ""
 
     sql = f"""
-    {base_select}
+    SELECT {_COLUMNS}
+    FROM actortargetevents
     {where}
     {order}
     {limit_clause};
@@ -79,3 +96,162 @@ def select_rows(
         with conn.cursor() as cur:
             cur.execute(sql)
             return cur.fetchall()
+
+
+# Row claims are for worker mode: any number of processes, on any number
+# of nodes, take small batches of rows with FOR UPDATE SKIP LOCKED so no
+# two of them get the same row (columns and index: storage/schema.py).
+
+
+def db_now() -> datetime:
+    """Database clock, so run boundaries agree across nodes."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT NOW();")
+            return cur.fetchone()[0]
+
+
+def claim_rows(
+    *,
+    mode: WorkerMode,
+    worker_id: str,
+    batch_size: int,
+    attempted_before: datetime,
+    lease_s: float = ROW_CLAIM_LEASE_S,
+) -> List[Tuple]:
+    """
+    Claim up to `batch_size` unclaimed (or lease-expired) rows of `mode`
+    for `worker_id`, in the select_rows row format. Rows another worker
+    is claiming right now are skipped, not waited for. Rows extraction
+    found no event in (no_event) or that failed ROW_MAX_FAILURES times
+    are never claimed, and rows attempted since `attempted_before` (the
+    start of the current run) are left alone until the next run.
+    """
+    if mode not in get_args(WorkerMode):
+        raise ValueError(f"Mode {mode} cannot be used by workers")
+
+    # every claimable row is unresolved and may hold an event; lets the
+    # partial index (actortargetevents_claim_idx) serve both modes
+    sql = f"""
+    WITH picked AS (
+        SELECT id
+        FROM actortargetevents
+        WHERE {_MODE_FILTERS[mode]}
+          AND states_resolved = FALSE
+          AND no_event = FALSE
+          AND failures < %s
+          AND (claimed_until IS NULL OR claimed_until < NOW())
+          AND (attempted_at IS NULL OR attempted_at < %s)
+        ORDER BY id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE actortargetevents ate
+    SET claimed_by = %s,
+        claimed_until = NOW() + make_interval(secs => %s)
+    FROM picked
+    WHERE ate.id = picked.id
+    RETURNING
+        ate.id,
+        ate.event_id,
+        ate.sentence_index,
+        ate.sentence_text,
+        ate.actor,
+        ate.target,
+        ate.event_type,
+        ate.actor_state,
+        ate.target_state,
+        ate.states_resolved;
+    """
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, (ROW_MAX_FAILURES, attempted_before, batch_size, worker_id, lease_s))
+            rows = cur.fetchall()
+        conn.commit()
+
+    return sorted(rows, key=lambda row: row[0])
+
+
+def renew_claims(*, row_ids: List[int], worker_id: str, lease_s: float = ROW_CLAIM_LEASE_S) -> int:
+    """Extend this worker's claims on `row_ids`. Returns how many it still holds."""
+    if not row_ids:
+        return 0
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE actortargetevents
+                SET claimed_until = NOW() + make_interval(secs => %s)
+                WHERE id = ANY(%s)
+                  AND claimed_by = %s;
+                """,
+                (lease_s, row_ids, worker_id),
+            )
+            held = cur.rowcount
+        conn.commit()
+    return held
+
+
+def release_rows(*, row_ids: List[int], worker_id: str, attempted: bool = True):
+    """
+    Give claimed rows back. `attempted` records that this run is done
+    with them; without it they can be claimed again right away.
+    """
+    if not row_ids:
+        return
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE actortargetevents
+                SET claimed_by = NULL,
+                    claimed_until = NULL,
+                    attempted_at = CASE WHEN %s THEN NOW() ELSE attempted_at END
+                WHERE id = ANY(%s)
+                  AND claimed_by = %s;
+                """,
+                (attempted, row_ids, worker_id),
+            )
+        conn.commit()
+
+
+def fail_rows(*, errors: Dict[int, str], worker_id: str):
+    """
+    Release claimed rows that raised, as attempted, counting the failure
+    and keeping the error (row id -> message) for inspection.
+    """
+    if not errors:
+        return
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE actortargetevents AS ate
+                SET claimed_by = NULL,
+                    claimed_until = NULL,
+                    attempted_at = NOW(),
+                    failures = ate.failures + 1,
+                    last_error = v.error
+                FROM unnest(%s::bigint[], %s::text[]) AS v(id, error)
+                WHERE ate.id = v.id
+                  AND ate.claimed_by = %s;
+                """,
+                (list(errors), list(errors.values()), worker_id),
+            )
+        conn.commit()
+
+
+def claim_stats() -> dict:
+    """Live claims per worker."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT claimed_by, COUNT(*)
+                FROM actortargetevents
+                WHERE claimed_until >= NOW()
+                GROUP BY claimed_by;
+                """
+            )
+            return {worker_id: count for worker_id, count in cur.fetchall()}
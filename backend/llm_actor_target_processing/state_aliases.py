@@ -0,0 +1,98 @@
+# Maintained alias list for deterministic grounding (see gazetteer.py).
+# Keyed by ISO3 so it stays valid whatever spelling the `states` table uses.
+# Aliases are matched case-insensitively on whole words; keep them
+# unambiguous (no person names, no words with common non-state meanings).
+
+STATE_ALIASES = {
+    "AFG": ["afghanistan", "afghan", "afghans", "kabul", "taliban government"],
+    "ARM": ["armenia", "armenian", "armenians", "yerevan"],
+    "AZE": ["azerbaijan", "azerbaijani", "azerbaijanis", "azeri", "baku"],
+    "BLR": ["belarus", "belarusian", "belarusians", "minsk"],
+    "BEL": ["belgium", "belgian", "belgians"],
+    "BRA": ["brazil", "brazilian", "brazilians", "brasilia"],
+    "CAN": ["canada", "canadian", "canadians", "ottawa"],
+    "CHN": ["china", "chinese", "beijing", "prc", "people's republic of china"],
+    "COL": ["colombia", "colombian", "colombians", "bogota"],
+    "CUB": ["cuba", "cuban", "cubans", "havana"],
+    "DNK": ["denmark", "danish", "danes", "copenhagen"],
+    "EGY": ["egypt", "egyptian", "egyptians", "cairo"],
+    "EST": ["estonia", "estonian", "estonians", "tallinn"],
+    "ETH": ["ethiopia", "ethiopian", "ethiopians", "addis ababa"],
+    "FIN": ["finland", "finnish", "finns", "helsinki"],
+    "FRA": ["france", "french", "paris", "elysee", "élysée"],
+    "DEU": ["germany", "german", "germans", "berlin", "bundeswehr"],
+    "GRC": ["greece", "greek", "greeks", "athens"],
+    "HUN": ["hungary", "hungarian", "hungarians", "budapest"],
+    "IND": ["india", "indian", "indians", "new delhi"],
+    "IDN": ["indonesia", "indonesian", "indonesians", "jakarta"],
+    "IRN": ["iran", "iranian", "iranians", "tehran", "islamic republic of iran", "irgc"],
+    "IRQ": ["iraq", "iraqi", "iraqis", "baghdad"],
+    "IRL": ["ireland", "irish", "dublin"],
+    "ISR": ["israel", "israeli", "israelis", "idf", "tel aviv", "knesset"],
+    "ITA": ["italy", "italian", "italians", "rome"],
+    "JPN": ["japan", "japanese", "tokyo"],
+    "JOR": ["jordanian", "jordanians", "amman", "kingdom of jordan"],
+    "KAZ": ["kazakhstan", "kazakh", "kazakhs", "astana"],
+    "KEN": ["kenya", "kenyan", "kenyans", "nairobi"],
+    "LVA": ["latvia", "latvian", "latvians", "riga"],
+    "LBN": ["lebanon", "lebanese", "beirut"],
+    "LBY": ["libya", "libyan", "libyans", "tripoli"],
+    "LTU": ["lithuania", "lithuanian", "lithuanians", "vilnius"],
+    "MEX": ["mexico", "mexican", "mexicans", "mexico city"],
+    "MDA": ["moldova", "moldovan", "moldovans", "chisinau"],
+    "NLD": ["netherlands", "dutch", "the hague", "amsterdam"],
+    "NGA": ["nigeria", "nigerian", "nigerians", "abuja"],
+    "PRK": ["north korea", "north korean", "north koreans", "pyongyang", "dprk"],
+    "NOR": ["norway", "norwegian", "norwegians", "oslo"],
+    "PAK": ["pakistan", "pakistani", "pakistanis", "islamabad"],
+    "PHL": ["philippines", "philippine", "filipino", "filipinos", "manila"],
+    "POL": ["poland", "polish", "poles", "warsaw"],
+    "PRT": ["portugal", "portuguese", "lisbon"],
+    "QAT": ["qatar", "qatari", "qataris", "doha"],
+    "ROU": ["romania", "romanian", "romanians", "bucharest"],
+    "RUS": ["russia", "russian", "russians", "moscow", "kremlin", "russian federation"],
+    "SAU": ["saudi arabia", "saudi", "saudis", "riyadh"],
+    "SRB": ["serbia", "serbian", "serbians", "serbs", "belgrade"],
+    "SOM": ["somalia", "somali", "somalis", "mogadishu"],
+    "ZAF": ["south africa", "south african", "south africans", "pretoria"],
+    "KOR": ["south korea", "south korean", "south koreans", "seoul", "republic of korea"],
+    "ESP": ["spain", "spanish", "madrid"],
+    "SDN": ["sudan", "sudanese", "khartoum"],
+    "SWE": ["sweden", "swedish", "swedes", "stockholm"],
+    "CHE": ["switzerland", "swiss", "bern"],
+    "SYR": ["syria", "syrian", "syrians", "damascus"],
+    "TWN": ["taiwan", "taiwanese", "taipei"],
+    "TUR": ["turkey", "turkish", "turks", "turkiye", "türkiye", "ankara"],
+    "UKR": ["ukraine", "ukrainian", "ukrainians", "kyiv", "kiev"],
+    "ARE": ["united arab emirates", "uae", "emirati", "emiratis", "abu dhabi"],
+    "GBR": [
+        "united kingdom", "uk", "britain", "great britain", "british",
+        "london", "downing street",
+    ],
+    "USA": [
+        "united states", "united states of america", "usa", "u s",
+        "america", "american", "americans", "washington", "white house",
+        "pentagon",
+    ],
+    "VEN": ["venezuela", "venezuelan", "venezuelans", "caracas"],
+    "VNM": ["vietnam", "vietnamese", "hanoi"],
+    "YEM": ["yemen", "yemeni", "yemenis", "sanaa"],
+}
+
+
+# Words that may surround a state alias without changing which state the
+# actor/target refers to ("Ukrainian forces", "the Israeli Prime Minister").
+# Anything else ("Iran-backed militias") sends the pair to the LLM.
+GENERIC_ROLE_WORDS = {
+    "the", "of", "s", "and", "its", "official", "officials", "state",
+    "government", "govt", "administration", "regime", "authorities",
+    "leadership", "leader", "leaders", "president", "prime", "minister",
+    "ministry", "foreign", "defense", "defence", "interior", "office",
+    "military", "army", "armed", "forces", "force", "troops", "soldiers",
+    "navy", "naval", "air", "airforce", "border", "guards",
+    "police", "security", "services", "intelligence", "embassy",
+    "ambassador", "diplomats", "envoy", "delegation", "parliament",
+    "spokesperson", "spokesman", "spokeswoman", "drones", "missiles",
+    "warships", "jets", "fighter", "special", "units", "side", "capital",
+    "people", "nation", "country",
+}
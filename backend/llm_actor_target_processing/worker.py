@@ -0,0 +1,218 @@
+"""
+Worker mode of the LLM processor. Instead of selecting the whole work set
+like process(), each worker claims small batches of actortargetevents rows
+(FOR UPDATE SKIP LOCKED, with a lease), processes them and commits them
+before claiming more. Any number of workers can run side by side, in the
+API process or on other nodes; rows of a worker that dies are claimed
+again once their lease (ROW_CLAIM_LEASE_S) runs out.
+
+    python -m llm_actor_target_processing.worker [--mode missing_states]
+        [--concurrency N] [--batch-size N] [--extract-batch-size N]
+        [--relevance-threshold X] [--forever]
+
+Expects the schema to be in place (applied by the API on startup).
+"""
+import os
+import asyncio
+import argparse
+from typing import Dict, Optional, get_args
+
+from storage.db import run_db, close_pool
+from storage.jobs import WORKER_ID, start_job, run_job
+from storage.write_buffer import ActorTargetWriteBuffer
+from llm_actor_target_processing.row_selectors import (
+    WorkerMode,
+    claim_rows,
+    renew_claims,
+    release_rows,
+    fail_rows,
+    ROW_CLAIM_LEASE_S,
+    db_now,
+)
+from llm_actor_target_processing.processor import (
+    process_rows,
+    load_grounding_context,
+    filter_relevant,
+    reset_stale_relevance,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_EXTRACT_BATCH_SIZE,
+)
+from llm_actor_target_processing.extract import EXTRACTION_CACHE
+from llm_actor_target_processing.ground import GROUNDING_CACHE
+from llm_actor_target_processing.relevance import RelevanceFilter, RELEVANCE_THRESHOLD
+from llm_actor_target_processing.llm_client import OllamaClient, close_http_clients
+from llm_actor_target_processing.initializer import initialize_actortargetevents
+
+
+# Rows claimed at once by each worker task; small, so a crash loses little
+ROW_CLAIM_BATCH_SIZE = int(os.getenv("ROW_CLAIM_BATCH_SIZE", 8))
+# Seconds an idle worker waits before looking for new rows (--forever)
+WORKER_POLL_S = float(os.getenv("WORKER_POLL_S", 30))
+
+# Job name of this process's worker in the jobs table
+WORKER_JOB_NAME = f"llm_worker:{WORKER_ID}"
+
+
+async def run_worker(
+    *,
+    mode: WorkerMode = "missing_states",
+    concurrency: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    extract_batch_size: Optional[int] = None,
+    relevance_threshold: Optional[float] = None,
+    drain: bool = True,
+    progress: Optional[Dict] = None,
+):
+    """
+    Claim, process and commit batches of `batch_size` rows with
+    `concurrency` tasks until nothing is left to claim (`drain`), or
+    forever, polling every WORKER_POLL_S. When no row is claimable the
+    worker splits new events first (safe to run concurrently).
+
+    Claims are renewed every ROW_CLAIM_LEASE_S / 3 while a batch is
+    being worked on. Rows are released as attempted once their results
+    are flushed, so each run tries a row at most once. A row that raises
+    is released with its failure counted (see fail_rows) while the rest
+    of its batch goes on; after ROW_MAX_FAILURES runs it is no longer
+    claimed. A batch whose flush fails keeps its claims until the lease
+    runs out, then is retried. Failed rows are counted in
+    `progress["failed"]`.
+    """
+    progress = progress if progress is not None else {}
+    for key in ("claimed", "processed", "failed", "relevance_filtered", "initialized"):
+        progress.setdefault(key, 0)
+    concurrency = max(1, concurrency or DEFAULT_CONCURRENCY)
+    batch_size = max(1, batch_size or ROW_CLAIM_BATCH_SIZE)
+    extract_batch_size = max(1, extract_batch_size or DEFAULT_EXTRACT_BATCH_SIZE)
+
+    client = OllamaClient()
+    context = await load_grounding_context()
+    relevance = RelevanceFilter(
+        threshold=RELEVANCE_THRESHOLD if relevance_threshold is None else relevance_threshold,
+        gazetteer=context["gazetteer"],
+    )
+    await run_db(reset_stale_relevance, relevance.signature)
+    # rows attempted after this (by any worker) are done for this run
+    run_started = await run_db(db_now)
+
+    async def claim():
+        while True:
+            rows = await run_db(
+                claim_rows,
+                mode=mode,
+                worker_id=WORKER_ID,
+                batch_size=batch_size,
+                attempted_before=run_started,
+            )
+            if rows:
+                return rows
+            # copied near-duplicate rows are never claimable, so keep
+            # splitting until something is claimable or nothing is left
+            init_result = await run_db(initialize_actortargetevents, limit=batch_size)
+            initialized = init_result["inserted"] + init_result["copied"]
+            if not initialized:
+                return []
+            progress["initialized"] += initialized
+
+    async def renew(row_ids):
+        while True:
+            await asyncio.sleep(ROW_CLAIM_LEASE_S / 3)
+            try:
+                held = await run_db(renew_claims, row_ids=row_ids, worker_id=WORKER_ID)
+                if held < len(row_ids):
+                    print(f"[worker] lost {len(row_ids) - held} claims (lease ran out)")
+            except Exception as e:
+                print(f"[worker] claim renewal failed: {e}")
+
+    async def work():
+        while True:
+            rows = await claim()
+            if not rows:
+                if drain:
+                    return
+                await asyncio.sleep(WORKER_POLL_S)
+                continue
+
+            row_ids = [row[0] for row in rows]
+            progress["claimed"] += len(row_ids)
+            renewer = asyncio.create_task(renew(row_ids))
+            errors: Dict[int, str] = {}
+            try:
+                rows = await filter_relevant(rows, relevance)
+                for i in range(0, len(rows), extract_batch_size):
+                    await process_rows(
+                        rows[i:i + extract_batch_size],
+                        client=client,
+                        writer=writer,
+                        extract_batch_size=extract_batch_size,
+                        errors=errors,
+                        **context,
+                    )
+                # the batch is committed before its claim is given up
+                await writer.flush_async()
+            except Exception as e:
+                print(f"[worker] batch of {len(row_ids)} rows failed, retried after the lease: {e}")
+                progress["failed"] += len(row_ids)
+                continue
+            finally:
+                renewer.cancel()
+                progress["relevance_filtered"] = relevance.snapshot()["filtered"]
+            progress["processed"] += len(rows) - len(errors)
+            progress["failed"] += len(errors)
+            if errors:
+                await run_db(fail_rows, errors=errors, worker_id=WORKER_ID)
+            await run_db(
+                release_rows,
+                row_ids=[row_id for row_id in row_ids if row_id not in errors],
+                worker_id=WORKER_ID,
+            )
+
+    print(f"[worker] {WORKER_ID}: {concurrency} tasks claiming {batch_size} {mode} rows at a time")
+    async with ActorTargetWriteBuffer() as writer:
+        tasks = [asyncio.create_task(work()) for _ in range(concurrency)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    print(f"[worker] {WORKER_ID} drained: {progress}")
+    return {
+        **progress,
+        "relevance": relevance.snapshot(),
+        "extraction_cache": EXTRACTION_CACHE.snapshot(),
+        "grounding_cache": GROUNDING_CACHE.snapshot(),
+        "gazetteer": context["gazetteer"].snapshot(),
+    }
+
+
+async def main(args: argparse.Namespace):
+    if not await run_db(start_job, WORKER_JOB_NAME):
+        print(f"[worker] {WORKER_JOB_NAME} is already running")
+        return
+    try:
+        await run_job(
+            WORKER_JOB_NAME,
+            run_worker,
+            mode=args.mode,
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+            extract_batch_size=args.extract_batch_size,
+            relevance_threshold=args.relevance_threshold,
+            drain=not args.forever,
+        )
+    finally:
+        await close_http_clients()
+        close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM extraction/grounding worker")
+    parser.add_argument("--mode", choices=get_args(WorkerMode), default="missing_states")
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--extract-batch-size", type=int)
+    parser.add_argument("--relevance-threshold", type=float)
+    parser.add_argument("--forever", action="store_true", help="keep polling for new rows")
+    asyncio.run(main(parser.parse_args()))
@@ -1,16 +1,86 @@
+import os
+import re
 import json
 import uuid
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from preprocessing.text_cleaner import process_raw_text
 
 
-def preprocess_batch(batch: list):
+# The process pool is opt-in (offline backfills, benchmarks): cleaning a
+# post takes microseconds, less than pickling it to a worker, so ingestion
+# chunks (INGEST_CHUNK_SIZE = 500) stay in-process by default.
+PARALLEL_MIN_BATCH = int(os.getenv("PREPROCESS_PARALLEL_MIN_BATCH", 20_000))
+PREPROCESS_WORKERS = int(os.getenv("PREPROCESS_WORKERS", 1))
+
+_EXECUTOR = None
+_EXECUTOR_WORKERS = 0
+_EXECUTOR_LOCK = threading.Lock()
+
+
+# Fixed namespace so the same post always maps to the same event_id
+EVENT_ID_NAMESPACE = uuid.UUID("6f1c3b0e-4f8e-5a7d-9c1e-2b8d4e6a0f13")
+
+_WS_RE = re.compile(r"\s+")
+
+
+def make_event_id(post: dict, text_clean: str) -> str:
+    """
+    Deterministic event id: from source + channel + message id when known,
+    otherwise from the source and normalized cleaned text.
+    """
+    source = post.get("source") or ""
+    if post.get("channel") and post.get("message_id") is not None:
+        name = f"{source}:{post['channel']}:{post['message_id']}"
+    else:
+        normalized = _WS_RE.sub(" ", text_clean or post.get("text_raw") or "").strip().casefold()
+        name = f"{source}:content:{normalized}"
+    return str(uuid.uuid5(EVENT_ID_NAMESPACE, name))
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    global _EXECUTOR, _EXECUTOR_WORKERS
+    # callers may be run_db threads; spawn, since forking a threaded
+    # process copies locks other threads hold
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None or _EXECUTOR_WORKERS != workers:
+            if _EXECUTOR is not None:
+                _EXECUTOR.shutdown(wait=False)
+            _EXECUTOR = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _EXECUTOR_WORKERS = workers
+        return _EXECUTOR
+
+
+def clean_texts(texts: list, workers: int | None = None) -> list:
+    """
+    process_raw_text over many texts. With more than one worker
+    (PREPROCESS_WORKERS or `workers`), batches of PARALLEL_MIN_BATCH or
+    more are spread over a process pool; everything else stays in-process.
+    """
+    workers = workers or PREPROCESS_WORKERS
+    if workers <= 1 or len(texts) < PARALLEL_MIN_BATCH:
+        return [process_raw_text(t) for t in texts]
+
+    chunksize = max(1, len(texts) // (workers * 4))
+    return list(_get_executor(workers).map(process_raw_text, texts, chunksize=chunksize))
+
+
+def preprocess_batch(batch: list, workers: int | None = None):
     processed = []
-    for idx, post in enumerate(batch, start=1):
-        post["event_id"] = str(uuid.uuid4())
-        text_clean, hashtags, emojis = process_raw_text(post['text_raw'])
+    seen = set()
+    cleaned = clean_texts([post['text_raw'] for post in batch], workers=workers)
+    for post, (text_clean, hashtags, emojis) in zip(batch, cleaned):
+        post["event_id"] = make_event_id(post, text_clean)
+        # drop in-batch duplicates (overlapping windows, reposted content)
+        if post["event_id"] in seen:
+            continue
+        seen.add(post["event_id"])
         post["text_processed"] = text_clean
         post["hashtags"] = json.dumps(hashtags)
         post["emojis"] = json.dumps(emojis)
         processed.append(post)
     return processed
-
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark: multi-pass vs fused text cleaning, serial vs process pool.
+
+    python -m preprocessing.bench_text_cleaner [n_posts] [workers]
+"""
+import os
+import sys
+import time
+import random
+
+from preprocessing.text_cleaner import process_raw_text, process_raw_text_multipass
+from preprocessing.batch_preprocessing import clean_texts
+
+
+_WORDS = [
+    "Russia", "Ukraine", "Israel", "Iran", "forces", "struck", "missile",
+    "drone", "sanctions", "talks", "border", "officials", "said", "on",
+    "Tuesday", "the", "ministry", "attack", "ceasefire", "warned",
+]
+_EXTRAS = [
+    "#breaking", "#Ukraine", "@worldnews", "https://t.me/worldnews/12345",
+    "\U0001F1FA\U0001F1E6", "\U0001F4A5\U0001F4A5", "RT", "!!!", "...", "?!",
+    "ＡＢＣ",  # fullwidth letters, changed by NFKC
+    "#ＡＢＣ", "ﬁre", "#RT", "RT\U0001F600h", "@user\U0001F600h", "R#T",
+]
+# Token separators; "" glues neighbours ("RT" + emoji + word, "@user#tag",
+# URL + emoji), where removing one token changes what the next step sees
+_SEPARATORS = [" "] * 6 + ["", "  ", "\n"]
+
+
+def synthetic_corpus(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    posts = []
+    for _ in range(n):
+        tokens = [rng.choice(_WORDS) for _ in range(rng.randint(15, 60))]
+        for _ in range(rng.randint(0, 6)):
+            tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(_EXTRAS))
+        text = tokens[0]
+        for token in tokens[1:]:
+            text += rng.choice(_SEPARATORS) + token
+        posts.append(text + ".")
+    return posts
+
+
+def _time(label: str, fn, n: int):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.2f}s  {n / elapsed:10.0f} posts/s")
+    return result
+
+
+def main(n: int = 100_000, workers: int = 0):
+    corpus = synthetic_corpus(n)
+    print(f"corpus: {n} synthetic posts")
+
+    multipass = _time("multi-pass (serial)", lambda: [process_raw_text_multipass(t) for t in corpus], n)
+    fused = _time("fused (serial)", lambda: [process_raw_text(t) for t in corpus], n)
+    if workers != 1:
+        _time(
+            "fused (process pool)",
+            lambda: clean_texts(corpus, workers=workers or os.cpu_count()),
+            n,
+        )
+
+    mismatches = sum(1 for a, b in zip(multipass, fused) if a != b)
+    print(f"fused vs multi-pass mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 0,
+    )
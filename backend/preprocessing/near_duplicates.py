@@ -0,0 +1,109 @@
+import os
+import re
+import hashlib
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+# Posts whose SimHashes differ in at most this many bits are near-duplicates.
+# Must stay below SIMHASH_BANDS so a near-duplicate always shares a band.
+NEAR_DUP_MAX_HAMMING = int(os.getenv("NEAR_DUP_MAX_HAMMING", 6))
+# Shorter texts are too unstable to fingerprint
+NEAR_DUP_MIN_TOKENS = int(os.getenv("NEAR_DUP_MIN_TOKENS", 8))
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 8
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Bit-sliced counters: every hash bit gets its own 16-bit lane in one big
+# int, so per-feature bit counting is 8 table lookups + additions instead
+# of 64 Python-level operations.
+_LANE_BITS = 16
+_LANE_MASK = (1 << _LANE_BITS) - 1
+_BYTE_LANES = [
+    [
+        sum(1 << ((byte_pos * 8 + bit) * _LANE_BITS) for bit in range(8) if (value >> bit) & 1)
+        for value in range(256)
+    ]
+    for byte_pos in range(SIMHASH_BITS // 8)
+]
+
+
+def _features(tokens: List[str]) -> List[str]:
+    # character 4-grams over the normalized token stream: many overlapping
+    # features per word keep the hash stable under one-word edits
+    joined = " ".join(tokens)
+    return [joined[i:i + 4] for i in range(max(1, len(joined) - 3))]
+
+
+def simhash(text: Optional[str]) -> Optional[int]:
+    """64-bit SimHash of `text`, or None when it is too short to compare."""
+    if not text:
+        return None
+    tokens = _TOKEN_RE.findall(text.casefold())
+    if len(tokens) < NEAR_DUP_MIN_TOKENS:
+        return None
+
+    features = _features(tokens)
+    lanes = 0
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        for byte_pos, byte in enumerate(digest):
+            lanes += _BYTE_LANES[byte_pos][byte]
+
+    # a bit is set when it was 1 in more than half of the features
+    half = len(features) / 2
+    value = 0
+    for bit in range(SIMHASH_BITS):
+        if (lanes >> (bit * _LANE_BITS)) & _LANE_MASK > half:
+            value |= 1 << bit
+    return value
+
+
+def bands(value: int) -> Tuple[int, ...]:
+    """Split a SimHash into SIMHASH_BANDS bucket keys (LSH index)."""
+    return tuple((value >> (i * _BAND_BITS)) & _BAND_MASK for i in range(SIMHASH_BANDS))
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def to_signed64(value: int) -> int:
+    """Store unsigned 64-bit hashes in a BIGINT column."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def from_signed64(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class SimHashIndex:
+    """
+    In-memory LSH index: SimHashes bucketed by band, so a lookup only
+    compares against entries sharing at least one band.
+    """
+
+    def __init__(self, max_hamming: int = NEAR_DUP_MAX_HAMMING):
+        if max_hamming >= SIMHASH_BANDS:
+            raise ValueError("max_hamming must be lower than SIMHASH_BANDS")
+        self.max_hamming = max_hamming
+        self._buckets: List[Dict[int, List[Tuple[Hashable, int]]]] = [
+            defaultdict(list) for _ in range(SIMHASH_BANDS)
+        ]
+
+    def add(self, key: Hashable, value: int):
+        for i, band in enumerate(bands(value)):
+            self._buckets[i][band].append((key, value))
+
+    def find(self, value: int) -> Optional[Hashable]:
+        """Key of the closest indexed entry within max_hamming, if any."""
+        best_key, best_distance = None, self.max_hamming + 1
+        for i, band in enumerate(bands(value)):
+            for key, other in self._buckets[i].get(band, ()):
+                distance = hamming(value, other)
+                if distance < best_distance:
+                    best_key, best_distance = key, distance
+        return best_key
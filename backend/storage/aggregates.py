@@ -0,0 +1,121 @@
+from typing import Iterable
+
+from storage.db import disable_statement_timeout
+
+
+# Pre-aggregated relation counts per day, maintained as rows are grounded.
+# Serves /api/relations and /api/globe/relations; date-window scans use
+# the primary key (day first).
+RELATION_DAILY_DDL = """
+CREATE TABLE IF NOT EXISTS relation_daily (
+    day          DATE   NOT NULL,
+    actor_iso3   TEXT   NOT NULL,
+    target_iso3  TEXT   NOT NULL,
+    event_type   TEXT   NOT NULL,
+    weight       BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, actor_iso3, target_iso3, event_type)
+);
+"""
+
+# Coarser buckets of the same counts, one row per (granularity, bucket
+# start, ...). Day-level series are read from relation_daily directly.
+ROLLUP_GRANULARITIES = ("week", "month")
+
+RELATION_ROLLUP_DDL = """
+CREATE TABLE IF NOT EXISTS relation_rollup (
+    granularity  TEXT   NOT NULL,
+    bucket       DATE   NOT NULL,
+    actor_iso3   TEXT   NOT NULL,
+    target_iso3  TEXT   NOT NULL,
+    event_type   TEXT   NOT NULL,
+    weight       BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket, actor_iso3, target_iso3, event_type)
+);
+"""
+
+# Grounded, fully specified rows by the bucket of their event time
+# (created_at is denormalized onto actortargetevents, no join needed)
+_BUCKETS_SELECT = """
+SELECT
+    {bucket}               AS bucket,
+    ate.actor_state_iso3,
+    ate.target_state_iso3,
+    ate.event_type,
+    COUNT(*)               AS weight
+FROM actortargetevents ate
+WHERE ate.states_resolved = TRUE
+  AND ate.created_at IS NOT NULL
+  AND ate.actor_state_iso3 IS NOT NULL
+  AND ate.target_state_iso3 IS NOT NULL
+  AND ate.event_type IS NOT NULL
+  {extra_where}
+GROUP BY 1, 2, 3, 4
+"""
+
+_DAY = "ate.created_at::date"
+
+
+def _rollup_select(granularity: str, extra_where: str) -> str:
+    bucket = f"date_trunc('{granularity}', ate.created_at)::date"
+    return f"""
+    SELECT '{granularity}', b.*
+    FROM ({_BUCKETS_SELECT.format(bucket=bucket, extra_where=extra_where)}) AS b
+    """
+
+
+def add_to_relation_aggregates(cur, row_ids: Iterable[int]):
+    """
+    Add newly grounded actortargetevents rows to relation_daily and the
+    week/month rollups.
+    Call in the same transaction as the grounding UPDATE, once per row.
+    """
+    row_ids = list(row_ids)
+    if not row_ids:
+        return
+    cur.execute(
+        f"""
+        INSERT INTO relation_daily (day, actor_iso3, target_iso3, event_type, weight)
+        {_BUCKETS_SELECT.format(bucket=_DAY, extra_where="AND ate.id = ANY(%s)")}
+        ON CONFLICT (day, actor_iso3, target_iso3, event_type)
+        DO UPDATE SET weight = relation_daily.weight + EXCLUDED.weight;
+        """,
+        (row_ids,),
+    )
+    for granularity in ROLLUP_GRANULARITIES:
+        cur.execute(
+            f"""
+            INSERT INTO relation_rollup (granularity, bucket, actor_iso3, target_iso3, event_type, weight)
+            {_rollup_select(granularity, "AND ate.id = ANY(%s)")}
+            ON CONFLICT (granularity, bucket, actor_iso3, target_iso3, event_type)
+            DO UPDATE SET weight = relation_rollup.weight + EXCLUDED.weight;
+            """,
+            (row_ids,),
+        )
+
+
+def rebuild_relation_aggregates(conn):
+    """Recompute relation_daily and the rollups from scratch. Caller commits."""
+    disable_statement_timeout(conn)
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE relation_daily;")
+        cur.execute(
+            f"""
+            INSERT INTO relation_daily (day, actor_iso3, target_iso3, event_type, weight)
+            {_BUCKETS_SELECT.format(bucket=_DAY, extra_where="")};
+            """
+        )
+    rebuild_relation_rollups(conn)
+
+
+def rebuild_relation_rollups(conn):
+    """Recompute relation_rollup from scratch. Caller commits."""
+    disable_statement_timeout(conn)
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE relation_rollup;")
+        for granularity in ROLLUP_GRANULARITIES:
+            cur.execute(
+                f"""
+                INSERT INTO relation_rollup (granularity, bucket, actor_iso3, target_iso3, event_type, weight)
+                {_rollup_select(granularity, "")};
+                """
+            )
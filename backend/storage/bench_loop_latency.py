@@ -0,0 +1,86 @@
+"""
+Event-loop latency under concurrent DB load: blocking psycopg2 calls made
+directly from coroutines vs the same calls through run_db().
+
+    python -m storage.bench_loop_latency [n_calls] [query_s] [--simulate]
+
+A probe task sleeps PROBE_INTERVAL_S in a loop and records how late it
+wakes up; that lag is what every other request on the worker would see.
+--simulate replaces the query with time.sleep (no database needed).
+"""
+import sys
+import time
+import asyncio
+import statistics
+
+from storage.db import get_connection, run_db
+
+
+PROBE_INTERVAL_S = 0.01
+
+
+def _query(seconds: float):
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_sleep(%s);", (seconds,))
+
+
+def _simulated_query(seconds: float):
+    time.sleep(seconds)
+
+
+async def _probe(lags: list, stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(PROBE_INTERVAL_S)
+        lags.append(loop.time() - start - PROBE_INTERVAL_S)
+
+
+async def _scenario(query, n_calls: int, query_s: float, offload: bool):
+    lags: list = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(lags, stop))
+    await asyncio.sleep(PROBE_INTERVAL_S)
+
+    async def call():
+        if offload:
+            await run_db(query, query_s)
+        else:
+            query(query_s)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(n_calls)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    return elapsed, lags
+
+
+def _report(label: str, elapsed: float, lags: list):
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(
+        f"{label:<12} wall {elapsed:6.2f}s  loop lag p50 {statistics.median(lags_ms):7.1f}ms"
+        f"  p99 {p99:7.1f}ms  max {lags_ms[-1]:7.1f}ms"
+    )
+
+
+async def main(n_calls: int = 50, query_s: float = 0.05, simulate: bool = False):
+    query = _simulated_query if simulate else _query
+    print(f"{n_calls} concurrent {'simulated ' if simulate else ''}queries of {query_s}s")
+    for label, offload in (("blocking", False), ("run_db", True)):
+        elapsed, lags = await _scenario(query, n_calls, query_s, offload)
+        _report(label, elapsed, lags)
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    asyncio.run(
+        main(
+            int(args[0]) if args else 50,
+            float(args[1]) if len(args) > 1 else 0.05,
+            simulate="--simulate" in sys.argv,
+        )
+    )
@@ -0,0 +1,255 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from storage.db import get_connection, run_db
+
+
+# "postgres" (shared by every worker/node), "sqlite" (shared per host)
+# or "memory" (LRU tier only)
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "postgres")
+LLM_CACHE_SQLITE_PATH = os.getenv("LLM_CACHE_SQLITE_PATH", "llm_cache.sqlite3")
+
+_MISS = object()
+
+
+class LRUCache:
+    """
+    In-process LRU tier with optional TTL.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl_s: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISS)
+            if item is _MISS:
+                return _MISS
+            stored_at, value = item
+            if self.ttl_s is not None and time.time() - stored_at > self.ttl_s:
+                del self._data[key]
+                return _MISS
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class PostgresCacheStore:
+    """
+    Durable tier in the `llm_cache` table, shared by all workers.
+    """
+
+    def get(self, namespace: str, key: str, ttl_s: Optional[float]) -> Any:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT value FROM llm_cache
+                    WHERE namespace = %s
+                      AND cache_key = %s
+                      AND (%s::float IS NULL
+                           OR created_at > NOW() - make_interval(secs => %s::float));
+                    """,
+                    (namespace, key, ttl_s, ttl_s),
+                )
+                row = cur.fetchone()
+        return _MISS if row is None else row[0]
+
+    def set(self, namespace: str, key: str, value: Any):
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO llm_cache (namespace, cache_key, value, created_at)
+                    VALUES (%s, %s, %s::jsonb, NOW())
+                    ON CONFLICT (namespace, cache_key)
+                    DO UPDATE SET value = EXCLUDED.value, created_at = NOW();
+                    """,
+                    (namespace, key, json.dumps(value)),
+                )
+            conn.commit()
+
+    def purge_expired(self, namespace: str, ttl_s: float) -> int:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    DELETE FROM llm_cache
+                    WHERE namespace = %s
+                      AND created_at < NOW() - make_interval(secs => %s::float);
+                    """,
+                    (namespace, ttl_s),
+                )
+                deleted = cur.rowcount
+            conn.commit()
+        return deleted
+
+
+class SqliteCacheStore:
+    """
+    Durable tier in a local SQLite file, shared by processes on one host.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_SQLITE_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    namespace  TEXT NOT NULL,
+                    cache_key  TEXT NOT NULL,
+                    value      TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, cache_key)
+                );
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, namespace: str, key: str, ttl_s: Optional[float]) -> Any:
+        min_created = time.time() - ttl_s if ttl_s is not None else float("-inf")
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM llm_cache WHERE namespace = ? AND cache_key = ? AND created_at > ?",
+                (namespace, key, min_created),
+            ).fetchone()
+        return _MISS if row is None else json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (namespace, cache_key, value, created_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), time.time()),
+            )
+
+    def purge_expired(self, namespace: str, ttl_s: float) -> int:
+        with self._connect() as conn:
+            cur = conn.execute(
+                "DELETE FROM llm_cache WHERE namespace = ? AND created_at < ?",
+                (namespace, time.time() - ttl_s),
+            )
+            return cur.rowcount
+
+
+def make_store(backend: str = LLM_CACHE_BACKEND):
+    if backend == "postgres":
+        return PostgresCacheStore()
+    if backend == "sqlite":
+        return SqliteCacheStore()
+    if backend == "memory":
+        return None
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+class TieredCache:
+    """
+    LRU tier in front of an optional durable store, with hit/miss counters.
+    Values must be JSON-serializable.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        *,
+        max_size: int = 10_000,
+        ttl_s: Optional[float] = None,
+        store=None,
+    ):
+        self.namespace = namespace
+        self.ttl_s = ttl_s
+        self.lru = LRUCache(max_size=max_size, ttl_s=ttl_s)
+        self.store = store
+        self.stats: Dict[str, int] = {
+            "lru_hits": 0,
+            "store_hits": 0,
+            "misses": 0,
+            "store_errors": 0,
+        }
+
+    def _get_lru(self, key: str) -> Any:
+        value = self.lru.get(key)
+        if value is not _MISS:
+            self.stats["lru_hits"] += 1
+        return value
+
+    def _get_store(self, key: str) -> Any:
+        try:
+            value = self.store.get(self.namespace, key, self.ttl_s)
+        except Exception as e:
+            print(f"[cache:{self.namespace}] store read failed: {e}")
+            self.stats["store_errors"] += 1
+            return _MISS
+        if value is not _MISS:
+            self.stats["store_hits"] += 1
+            self.lru.set(key, value)
+        return value
+
+    def _set_store(self, key: str, value: Any):
+        try:
+            self.store.set(self.namespace, key, value)
+        except Exception as e:
+            print(f"[cache:{self.namespace}] store write failed: {e}")
+            self.stats["store_errors"] += 1
+
+    def _result(self, value: Any) -> Tuple[bool, Any]:
+        if value is _MISS:
+            self.stats["misses"] += 1
+            return False, None
+        return True, value
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        value = self._get_lru(key)
+        if value is _MISS and self.store is not None:
+            value = self._get_store(key)
+        return self._result(value)
+
+    async def aget(self, key: str) -> Tuple[bool, Any]:
+        """get() for coroutines: durable-tier reads run on the DB thread pool."""
+        value = self._get_lru(key)
+        if value is _MISS and self.store is not None:
+            value = await run_db(self._get_store, key)
+        return self._result(value)
+
+    def set(self, key: str, value: Any):
+        self.lru.set(key, value)
+        if self.store is not None:
+            self._set_store(key, value)
+
+    async def aset(self, key: str, value: Any):
+        self.lru.set(key, value)
+        if self.store is not None:
+            await run_db(self._set_store, key, value)
+
+    def purge_expired(self) -> int:
+        if self.store is None or self.ttl_s is None:
+            return 0
+        return self.store.purge_expired(self.namespace, self.ttl_s)
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats["lru_hits"] + self.stats["store_hits"] + self.stats["misses"]
+        hits = lookups - self.stats["misses"]
+        return {
+            **self.stats,
+            "lru_size": len(self.lru),
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+        }
@@ -0,0 +1,62 @@
+from typing import Dict, Iterable, Optional, Tuple
+from storage.db import get_connection
+
+
+# Per-channel ingestion high-water mark: newest message id/timestamp stored
+CHANNEL_STATE_DDL = """
+CREATE TABLE IF NOT EXISTS channel_state (
+    channel          TEXT        PRIMARY KEY,
+    last_message_id  BIGINT      NOT NULL,
+    last_message_at  TIMESTAMPTZ,
+    updated_at       TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+"""
+
+
+def get_high_water_marks() -> Dict[str, int]:
+    """channel -> last ingested message id"""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT channel, last_message_id FROM channel_state;")
+            return dict(cur.fetchall())
+
+
+def high_water_marks_from_posts(posts: Iterable[dict]) -> Dict[str, Tuple[int, Optional[str]]]:
+    """channel -> (max message id, its created_at) over a chunk of posts"""
+    marks: Dict[str, Tuple[int, Optional[str]]] = {}
+    for post in posts:
+        channel = post.get("channel")
+        message_id = post.get("message_id")
+        if not channel or message_id is None:
+            continue
+        if channel not in marks or message_id > marks[channel][0]:
+            marks[channel] = (message_id, post.get("created_at"))
+    return marks
+
+
+def advance_high_water_marks(conn, marks: Dict[str, Tuple[int, Optional[str]]]):
+    """Move marks forward only (never back). Caller commits."""
+    if not marks:
+        return
+    with conn.cursor() as cur:
+        for channel, (message_id, message_at) in marks.items():
+            cur.execute(
+                """
+                INSERT INTO channel_state (channel, last_message_id, last_message_at, updated_at)
+                VALUES (%s, %s, %s, NOW())
+                ON CONFLICT (channel) DO UPDATE SET
+                    last_message_at = CASE
+                        WHEN EXCLUDED.last_message_id > channel_state.last_message_id
+                        THEN EXCLUDED.last_message_at
+                        ELSE channel_state.last_message_at
+                    END,
+                    last_message_id = GREATEST(channel_state.last_message_id, EXCLUDED.last_message_id),
+                    updated_at = NOW();
+                """,
+                (channel, message_id, message_at),
+            )
+
+
+def clear_high_water_marks(conn):
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM channel_state;")
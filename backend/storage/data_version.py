@@ -0,0 +1,68 @@
+import os
+import time
+import threading
+from typing import Optional
+
+from storage.db import get_connection
+
+
+# Seconds a process trusts its last read of the data version. Jobs bump it
+# when they finish; other processes see the bump within this delay.
+DATA_VERSION_POLL_S = float(os.getenv("DATA_VERSION_POLL_S", 5))
+
+# Single-row counter of "relation data changed" events
+DATA_VERSION_DDL = """
+CREATE TABLE IF NOT EXISTS data_version (
+    id          SMALLINT    PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version     BIGINT      NOT NULL DEFAULT 0,
+    updated_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+INSERT INTO data_version (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+"""
+
+_lock = threading.Lock()
+_version: Optional[int] = None
+_checked_at = 0.0
+
+
+def bump_data_version(cur):
+    """Call in the transaction that finishes a job, then `forget_data_version()`."""
+    cur.execute(
+        """
+        UPDATE data_version
+        SET version = version + 1,
+            updated_at = NOW()
+        WHERE id = 1;
+        """
+    )
+
+
+def forget_data_version():
+    """Make the next `current_data_version()` re-read the counter."""
+    global _checked_at
+    with _lock:
+        _checked_at = 0.0
+
+
+def current_data_version() -> int:
+    global _version, _checked_at
+    with _lock:
+        if _version is not None and time.monotonic() - _checked_at < DATA_VERSION_POLL_S:
+            return _version
+
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT version FROM data_version WHERE id = 1;")
+                row = cur.fetchone()
+        version = row[0] if row else 0
+    except Exception as e:
+        print(f"[data_version] read failed: {e}")
+        if _version is None:
+            raise
+        version = _version
+
+    with _lock:
+        _version = version
+        _checked_at = time.monotonic()
+    return version
@@ -1,7 +1,14 @@
 import psycopg2
 import os
+import time
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from psycopg2 import extensions
 from psycopg2.extras import execute_values
-from contextlib import contextmanager
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+from contextlib import contextmanager, asynccontextmanager
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -9,20 +16,250 @@ load_dotenv()
 # Default batch size for fetching events
 BATCH_SIZE = 100
 
+# Connection pool sizing / behaviour
+# psycopg2 keeps at most DB_POOL_MIN idle connections open between uses
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 4))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 20))
+# Seconds to wait for a free connection before giving up
+DB_POOL_TIMEOUT_S = float(os.getenv("DB_POOL_TIMEOUT_S", 30))
+# Connections idle longer than this are pinged before being handed out
+DB_POOL_PING_AFTER_S = float(os.getenv("DB_POOL_PING_AFTER_S", 30))
+# Server-side statement timeout (ms, 0 disables)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 60_000))
+# Threads running blocking DB calls for async code (one per pooled connection)
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", DB_POOL_MAX))
 
-@contextmanager
-def get_connection():
-    conn = psycopg2.connect(
+
+class ConnectionPool:
+    """
+    Process-wide, thread-safe psycopg2 pool.
+
+    Callers block (up to `timeout_s`) when all `maxconn` connections are
+    checked out. Connections are health-checked on checkout and rolled
+    back on return, so an uncommitted transaction never leaks to the
+    next user (same semantics as the old connect/close per call).
+    """
+
+    def __init__(self, minconn: int, maxconn: int, timeout_s: float, **conn_kwargs):
+        self.maxconn = maxconn
+        self.timeout_s = timeout_s
+        self._pool = ThreadedConnectionPool(minconn, maxconn, **conn_kwargs)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used = {}
+        # connections handed out at least once and not closed since
+        self._open = set()
+        self._lock = threading.Lock()
+        self.stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "discarded": 0,
+            "in_use": 0,
+        }
+
+    def getconn(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats["waits"] += 1
+            if not self._slots.acquire(timeout=self.timeout_s):
+                with self._lock:
+                    self.stats["timeouts"] += 1
+                raise PoolError(
+                    f"no DB connection available after {self.timeout_s}s"
+                )
+        try:
+            conn = self._checkout_healthy()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.stats["checkouts"] += 1
+            self.stats["in_use"] += 1
+            self._open.add(id(conn))
+        return conn
+
+    def _checkout_healthy(self):
+        for _ in range(self.maxconn + 1):
+            conn = self._pool.getconn()
+            if self._is_healthy(conn):
+                return conn
+            with self._lock:
+                self.stats["discarded"] += 1
+                self._open.discard(id(conn))
+            self._pool.putconn(conn, close=True)
+        raise psycopg2.OperationalError("could not obtain a healthy DB connection")
+
+    def _is_healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        idle_for = time.monotonic() - self._last_used.get(id(conn), time.monotonic())
+        if idle_for < DB_POOL_PING_AFTER_S:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def putconn(self, conn):
+        close = bool(conn.closed)
+        if not close:
+            try:
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if conn.autocommit:
+                    conn.autocommit = False
+            except psycopg2.Error:
+                close = True
+
+        if close:
+            with self._lock:
+                self.stats["discarded"] += 1
+        self._pool.putconn(conn, close=close)
+        if conn.closed:
+            self._last_used.pop(id(conn), None)
+        else:
+            self._last_used[id(conn)] = time.monotonic()
+
+        with self._lock:
+            self.stats["in_use"] -= 1
+            # psycopg2 closes returned connections beyond minconn
+            if conn.closed:
+                self._open.discard(id(conn))
+        self._slots.release()
+
+    def snapshot(self):
+        """
+        Counters plus open/idle connections, as seen through getconn /
+        putconn (connections opened at startup count once first used).
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["open"] = len(self._open)
+        stats["max_size"] = self.maxconn
+        stats["idle"] = stats["open"] - stats["in_use"]
+        return stats
+
+    def closeall(self):
+        self._pool.closeall()
+
+
+_POOL = None
+_POOL_PID = None
+_POOL_LOCK = threading.Lock()
+
+
+def _connection_kwargs():
+    kwargs = dict(
         database=os.getenv("DB_NAME"),
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
         host=os.getenv("DB_HOST", "localhost"),
         port=os.getenv("DB_PORT", 5432),
+        keepalives=1,
+        keepalives_idle=30,
+    )
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        kwargs["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    return kwargs
+
+
+def disable_statement_timeout(conn):
+    """
+    Lift DB_STATEMENT_TIMEOUT_MS for the rest of the current transaction,
+    for maintenance (schema backfills, aggregate rebuilds, resets) that
+    legitimately runs longer than any request.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SET LOCAL statement_timeout = 0;")
+
+
+def get_pool() -> ConnectionPool:
+    global _POOL, _POOL_PID
+    # a forked child must not reuse the parent's sockets
+    if _POOL is None or _POOL_PID != os.getpid():
+        with _POOL_LOCK:
+            if _POOL is None or _POOL_PID != os.getpid():
+                _POOL = ConnectionPool(
+                    DB_POOL_MIN,
+                    DB_POOL_MAX,
+                    DB_POOL_TIMEOUT_S,
+                    **_connection_kwargs(),
+                )
+                _POOL_PID = os.getpid()
+    return _POOL
+
+
+def pool_stats():
+    if _POOL is None or _POOL_PID != os.getpid():
+        return {"initialized": False, "max_size": DB_POOL_MAX}
+    return {"initialized": True, **_POOL.snapshot()}
+
+
+def close_pool():
+    global _POOL, _EXECUTOR
+    with _POOL_LOCK:
+        if _EXECUTOR is not None:
+            _EXECUTOR.shutdown(wait=True)
+            _EXECUTOR = None
+        if _POOL is not None and _POOL_PID == os.getpid():
+            _POOL.closeall()
+        _POOL = None
+
+
+_EXECUTOR = None
+
+
+def _db_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _POOL_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(
+                    max_workers=DB_EXECUTOR_WORKERS,
+                    thread_name_prefix="db",
+                )
+    return _EXECUTOR
+
+
+async def run_db(fn, *args, **kwargs):
+    """
+    Run blocking (psycopg2) code on the DB thread pool, so the event loop
+    never waits on Postgres I/O:
+
+        running = await run_db(is_job_running, "llm_processing")
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _db_executor(), functools.partial(fn, *args, **kwargs)
     )
+
+
+@contextmanager
+def get_connection():
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+
+@asynccontextmanager
+async def get_connection_async():
+    """
+    get_connection() for coroutines: checkout and return happen on the
+    DB thread pool. Use the connection only through run_db(...).
+    """
+    pool = await run_db(get_pool)
+    conn = await run_db(pool.getconn)
     try:
         yield conn
     finally:
-        conn.close()
+        await run_db(pool.putconn, conn)
 
 
 
@@ -32,11 +269,9 @@ def fetch_events(conn):
             """
             SELECT event_id, text_processed
             FROM events
-            WHERE text_processed IS NOT NULL
+            WHERE materialized_at IS NULL
+              AND text_processed IS NOT NULL
               AND lang = 'eng'
-              AND event_id NOT IN (
-                  SELECT DISTINCT event_id FROM actortargetevents
-              )
             LIMIT %s
         """,
             (BATCH_SIZE,),
@@ -82,6 +317,17 @@ def insert_actor_target_rows(conn, rows):
 
 # Processing Status Helpers : 
 
+def mark_events_materialized(conn, event_ids):
+    """Advance the materialization watermark for split events."""
+    if not event_ids:
+        return
+    with conn.cursor() as cur:
+        cur.execute(
+            "UPDATE events SET materialized_at = NOW() WHERE event_id IN %s",
+            (tuple(event_ids),),
+        )
+
+
 def mark_event_processing(conn, event_id):
     with conn.cursor() as cur:
         cur.execute(
@@ -0,0 +1,214 @@
+import os
+from typing import Dict, Iterable, List
+
+from psycopg2.extras import execute_values
+
+from preprocessing.near_duplicates import (
+    SimHashIndex,
+    simhash,
+    to_signed64,
+    from_signed64,
+)
+from storage.aggregates import add_to_relation_aggregates
+
+
+# Reposts are only looked for among events this close in time
+NEAR_DUP_WINDOW_DAYS = int(os.getenv("NEAR_DUP_WINDOW_DAYS", 3))
+
+
+# One SimHash per fingerprinted event. canonical_event_id is set when the
+# event is a near-duplicate of an earlier one (always a canonical itself).
+EVENT_FINGERPRINTS_DDL = """
+CREATE TABLE IF NOT EXISTS event_fingerprints (
+    event_id            TEXT        PRIMARY KEY,
+    simhash             BIGINT      NOT NULL,
+    canonical_event_id  TEXT,
+    created_at          TIMESTAMPTZ NOT NULL
+);
+CREATE INDEX IF NOT EXISTS event_fingerprints_created_at_idx
+    ON event_fingerprints (created_at);
+"""
+
+# actortargetevents rows copied from a canonical event's row point back to
+# it; they are kept in sync with it and never sent to the LLM.
+SOURCE_ROW_DDL = """
+ALTER TABLE actortargetevents ADD COLUMN IF NOT EXISTS source_row_id BIGINT;
+CREATE INDEX IF NOT EXISTS actortargetevents_source_row_idx
+    ON actortargetevents (source_row_id)
+    WHERE source_row_id IS NOT NULL;
+"""
+
+
+def register_fingerprints(conn, events: List[dict]) -> Dict[str, int]:
+    """
+    Fingerprint `text_processed` of freshly ingested events and link
+    near-duplicates (earlier events in the window, or earlier in the same
+    batch) to their canonical event. Caller commits.
+    """
+    hashed = []
+    for event in events:
+        value = simhash(event.get("text_processed"))
+        if value is not None and event.get("created_at"):
+            hashed.append((event["event_id"], value, event["created_at"]))
+    if not hashed:
+        return {"fingerprinted": 0, "near_duplicates": 0}
+    hashed.sort(key=lambda item: item[2])
+
+    index = SimHashIndex()
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT event_id, simhash, COALESCE(canonical_event_id, event_id)
+            FROM event_fingerprints
+            WHERE created_at BETWEEN %s::timestamptz - make_interval(days => %s)
+                                 AND %s::timestamptz + make_interval(days => %s)
+              AND NOT (event_id = ANY(%s));
+            """,
+            (
+                hashed[0][2], NEAR_DUP_WINDOW_DAYS,
+                hashed[-1][2], NEAR_DUP_WINDOW_DAYS,
+                [event_id for event_id, _, _ in hashed],
+            ),
+        )
+        for _, value, canonical_id in cur.fetchall():
+            index.add(canonical_id, from_signed64(value))
+
+        rows = []
+        for event_id, value, created_at in hashed:
+            canonical_id = index.find(value)
+            rows.append((event_id, to_signed64(value), canonical_id, created_at))
+            index.add(canonical_id or event_id, value)
+
+        registered = execute_values(
+            cur,
+            """
+            INSERT INTO event_fingerprints (event_id, simhash, canonical_event_id, created_at)
+            VALUES %s
+            ON CONFLICT (event_id) DO NOTHING
+            RETURNING canonical_event_id;
+            """,
+            rows,
+            template="(%s, %s, %s, %s::timestamptz)",
+            page_size=len(rows),
+            fetch=True,
+        )
+
+    return {
+        "fingerprinted": len(registered),
+        "near_duplicates": sum(1 for (canonical_id,) in registered if canonical_id),
+    }
+
+
+# Events fingerprinted per batch by backfill_fingerprints
+BACKFILL_BATCH_SIZE = 5000
+
+
+def backfill_fingerprints(conn) -> int:
+    """
+    Fingerprint existing events that have no fingerprint yet, oldest
+    first, linking near-duplicates like ingestion does. Caller commits.
+    """
+    total = 0
+    after = ("", "")
+    while True:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT ev.event_id, ev.text_processed, ev.created_at, ev.created_at::text
+                FROM events ev
+                WHERE (ev.created_at::text, ev.event_id) > (%s, %s)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM event_fingerprints fp
+                      WHERE fp.event_id = ev.event_id
+                  )
+                ORDER BY ev.created_at::text, ev.event_id
+                LIMIT %s;
+                """,
+                (after[0], after[1], BACKFILL_BATCH_SIZE),
+            )
+            batch = cur.fetchall()
+        if not batch:
+            break
+        after = (batch[-1][3], batch[-1][0])
+        total += register_fingerprints(
+            conn,
+            [
+                {"event_id": event_id, "text_processed": text, "created_at": created_at}
+                for event_id, text, created_at, _ in batch
+            ],
+        )["fingerprinted"]
+    print(f"[fingerprints] backfilled {total} events")
+    return total
+
+
+def clear_fingerprints(conn):
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE event_fingerprints;")
+
+
+def copy_canonical_rows(cur, event_id, canonical_event_id) -> int:
+    """
+    Materialize a near-duplicate event by copying its canonical event's
+    sentence rows, extraction and grounding included. Returns rows copied.
+    """
+    cur.execute(
+        """
+        INSERT INTO actortargetevents (
+            event_id, sentence_index, sentence_text,
+            actor, target, event_type,
+            actor_state, target_state, actor_state_iso3, target_state_iso3,
+            states_resolved, source_row_id, created_at
+        )
+        SELECT
+            dup.event_id,
+            src.sentence_index, src.sentence_text,
+            src.actor, src.target, src.event_type,
+            src.actor_state, src.target_state, src.actor_state_iso3, src.target_state_iso3,
+            src.states_resolved, src.id, dup.created_at::timestamptz
+        FROM actortargetevents src
+        CROSS JOIN (
+            SELECT event_id, created_at FROM events WHERE event_id = %s
+        ) AS dup
+        WHERE src.event_id = %s
+          AND src.source_row_id IS NULL
+        ON CONFLICT DO NOTHING
+        RETURNING id, states_resolved;
+        """,
+        (event_id, canonical_event_id),
+    )
+    copied = cur.fetchall()
+    add_to_relation_aggregates(cur, [row_id for row_id, resolved in copied if resolved])
+    return len(copied)
+
+
+def propagate_to_linked_rows(cur, row_ids: Iterable[int]):
+    """
+    Mirror extraction/grounding results of canonical rows onto the rows
+    copied from them. Call in the same transaction as the update.
+    """
+    row_ids = list(row_ids)
+    if not row_ids:
+        return
+    cur.execute(
+        """
+        UPDATE actortargetevents AS dup
+        SET actor = src.actor,
+            target = src.target,
+            event_type = src.event_type,
+            actor_state = src.actor_state,
+            target_state = src.target_state,
+            actor_state_iso3 = src.actor_state_iso3,
+            target_state_iso3 = src.target_state_iso3,
+            states_resolved = src.states_resolved
+        FROM actortargetevents AS src, actortargetevents AS prev
+        WHERE src.id = ANY(%s)
+          AND dup.source_row_id = src.id
+          AND prev.id = dup.id
+        RETURNING dup.id, prev.states_resolved, dup.states_resolved;
+        """,
+        (row_ids,),
+    )
+    add_to_relation_aggregates(
+        cur,
+        [row_id for row_id, was_resolved, resolved in cur.fetchall() if resolved and not was_resolved],
+    )
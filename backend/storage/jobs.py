@@ -1,42 +1,112 @@
-from datetime import datetime
-from storage.db import get_connection
+import os
+import json
+import socket
+import asyncio
+from typing import Dict, Optional
 
+from storage.db import get_connection, run_db
+from storage.data_version import bump_data_version, forget_data_version
 
-def start_job(job_name: str):
+
+# A running job whose heartbeat is older than this is considered dead
+# (crashed worker) and may be reclaimed by the next start.
+JOB_LEASE_S = float(os.getenv("JOB_LEASE_S", 60))
+# How often a running job renews its lease and saves its progress
+JOB_HEARTBEAT_S = float(os.getenv("JOB_HEARTBEAT_S", 15))
+
+# Identifies this process as the owner of the jobs it runs
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Lease / progress columns on top of the base jobs table
+JOBS_LEASE_DDL = """
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMPTZ;
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS owner TEXT;
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS progress JSONB NOT NULL DEFAULT '{}'::jsonb;
+"""
+
+# Running rows without a live lease (NULL heartbeat: started before leases existed)
+_STALE = "(heartbeat_at IS NULL OR heartbeat_at < NOW() - make_interval(secs => %s))"
+_STALE_EXISTING = _STALE.replace("heartbeat_at", "jobs.heartbeat_at")
+
+
+def start_job(job_name: str) -> bool:
+    """
+    Claim `job_name` for this worker. Returns False when it is already
+    running under a live lease; a stale lease is taken over.
+    """
     with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                """
-                INSERT INTO jobs (job_name, status, started_at)
-                VALUES (%s, 'running', NOW())
+                f"""
+                INSERT INTO jobs (job_name, status, started_at, heartbeat_at, owner, progress)
+                VALUES (%s, 'running', NOW(), NOW(), %s, '{{}}'::jsonb)
                 ON CONFLICT (job_name)
                 DO UPDATE SET
                   status = 'running',
                   started_at = NOW(),
                   finished_at = NULL,
-                  error = NULL;
+                  error = NULL,
+                  heartbeat_at = NOW(),
+                  owner = EXCLUDED.owner,
+                  progress = '{{}}'::jsonb
+                WHERE jobs.status <> 'running'
+                   OR {_STALE_EXISTING}
+                RETURNING job_name;
                 """,
-                (job_name,),
+                (job_name, WORKER_ID, JOB_LEASE_S),
+            )
+            claimed = cur.fetchone() is not None
+        conn.commit()
+    return claimed
+
+
+def heartbeat_job(job_name: str, progress: Optional[Dict] = None) -> bool:
+    """Renew this worker's lease. Returns False if the job is no longer ours."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE jobs
+                SET heartbeat_at = NOW(),
+                    progress = COALESCE(%s::jsonb, progress)
+                WHERE job_name = %s
+                  AND status = 'running'
+                  AND owner = %s;
+                """,
+                (json.dumps(progress, default=str) if progress is not None else None, job_name, WORKER_ID),
             )
+            owned = cur.rowcount == 1
         conn.commit()
+    return owned
 
 
-def finish_job(job_name: str):
+def finish_job(job_name: str, progress: Optional[Dict] = None):
+    """Record success, unless the job was reset or reclaimed by another worker since."""
     with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
                 UPDATE jobs
                 SET status = 'done',
-                    finished_at = NOW()
-                WHERE job_name = %s;
+                    finished_at = NOW(),
+                    progress = COALESCE(%s::jsonb, progress)
+                WHERE job_name = %s
+                  AND status = 'running'
+                  AND owner IS NOT DISTINCT FROM %s;
                 """,
-                (job_name,),
+                (json.dumps(progress, default=str) if progress is not None else None, job_name, WORKER_ID),
             )
+            # a job reset meanwhile matches nothing: keep cached responses
+            recorded = cur.rowcount > 0
+            if recorded:
+                # cached /relations responses are stale now
+                bump_data_version(cur)
         conn.commit()
+    if recorded:
+        forget_data_version()
 
 
-def fail_job(job_name: str, error: str):
+def fail_job(job_name: str, error: str, progress: Optional[Dict] = None):
     with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
@@ -44,27 +114,61 @@ def fail_job(job_name: str, error: str):
                 UPDATE jobs
                 SET status = 'failed',
                     finished_at = NOW(),
-                    error = %s
-                WHERE job_name = %s;
+                    error = %s,
+                    progress = COALESCE(%s::jsonb, progress)
+                WHERE job_name = %s
+                  AND status = 'running'
+                  AND owner IS NOT DISTINCT FROM %s;
                 """,
-                (error, job_name),
+                (error, json.dumps(progress, default=str) if progress is not None else None, job_name, WORKER_ID),
             )
+            # a job reset meanwhile matches nothing: keep cached responses
+            recorded = cur.rowcount > 0
+            if recorded:
+                # work committed before the failure is visible too
+                bump_data_version(cur)
         conn.commit()
+    if recorded:
+        forget_data_version()
 
 
 def is_job_running(job_name: str) -> bool:
+    """Running under a live lease."""
     with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                """
-                SELECT status FROM jobs
+                f"""
+                SELECT status = 'running' AND NOT {_STALE}
+                FROM jobs
                 WHERE job_name = %s;
                 """,
-                (job_name,),
+                (JOB_LEASE_S, job_name),
             )
             row = cur.fetchone()
 
-    return row is not None and row[0] == "running"
+    return row is not None and row[0]
+
+
+def expire_stale_jobs() -> int:
+    """Mark running jobs whose lease ran out as failed. Returns how many."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                UPDATE jobs
+                SET status = 'failed',
+                    finished_at = NOW(),
+                    error = 'lease expired: worker ' || COALESCE(owner, '?') || ' stopped heartbeating'
+                WHERE status = 'running'
+                  AND {_STALE};
+                """,
+                (JOB_LEASE_S,),
+            )
+            expired = cur.rowcount
+        conn.commit()
+    if expired:
+        print(f"[jobs] expired {expired} stale job(s)")
+    return expired
 
 
 def reset_job(job_name: str):
@@ -81,3 +185,33 @@ def reset_job(job_name: str):
                 (job_name,),
             )
         conn.commit()
+
+
+async def run_job(job_name: str, fn, *args, **kwargs):
+    """
+    Run `await fn(*args, progress=..., **kwargs)` as the already claimed
+    job `job_name` (see start_job): renews the lease every JOB_HEARTBEAT_S
+    with the progress dict `fn` updates, then records done / failed.
+    Meant for BackgroundTasks, so errors are recorded, not raised.
+    """
+    progress: Dict = {}
+
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_S)
+            try:
+                if not await run_db(heartbeat_job, job_name, progress):
+                    print(f"[jobs] {job_name}: lease lost (reset or reclaimed)")
+            except Exception as e:
+                print(f"[jobs] {job_name}: heartbeat failed: {e}")
+
+    ticker = asyncio.create_task(heartbeat())
+    try:
+        result = await fn(*args, progress=progress, **kwargs)
+        await run_db(finish_job, job_name, {**progress, **(result or {})})
+        return result
+    except Exception as e:
+        print(f"[jobs] {job_name} failed: {e}")
+        await run_db(fail_job, job_name, str(e), progress)
+    finally:
+        ticker.cancel()
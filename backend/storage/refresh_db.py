@@ -1,10 +1,19 @@
-from storage.db import get_connection
-from storage.jobs import start_job, finish_job, fail_job, is_job_running
+import io
+from contextlib import aclosing
+
+from storage.db import get_connection_async, run_db, disable_statement_timeout
+from storage.aggregates import rebuild_relation_aggregates
+from storage.fingerprints import register_fingerprints, clear_fingerprints
 from preprocessing.batch_preprocessing import preprocess_batch
-from ingestion.telegram.fetch_posts import fetch_telegram
+from storage.channel_state import (
+    get_high_water_marks,
+    high_water_marks_from_posts,
+    advance_high_water_marks,
+    clear_high_water_marks,
+)
+from ingestion.telegram.fetch_posts import iter_telegram, iter_telegram_incremental
 from datetime import datetime
-from ingestion.telegram.fetch_posts import fetch_telegram_period
-from llm_actor_target_processing.processor import process
+from ingestion.telegram.fetch_posts import iter_telegram_period
 
 
 def clear_events_table(conn):
@@ -12,118 +21,228 @@ def clear_events_table(conn):
         cur.execute("DELETE FROM events;")
 
 
-def insert_events(conn, events):
+EVENT_COLUMNS = (
+    "event_id", "source", "author_id", "text_raw", "text_processed", "created_at",
+    "confidence_score", "heat_score", "lang", "geo", "context_annotations",
+    "hashtags", "emojis", "channel", "message_id",
+)
+
+
+def _copy_escape(value) -> str:
+    """Render one value in COPY text format."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+        .replace("\t", "\\t")
+    )
+
+
+def insert_events(conn, events) -> dict:
+    """
+    Bulk insert: COPY events into a temp staging table, then merge them
+    with a single INSERT ... SELECT ... ON CONFLICT DO NOTHING, which
+    skips known event ids and known (source, channel, message_id) posts.
+    Events stored before ids were derived from the post have a random id
+    and no channel/message_id; a re-fetched post adopts its matching old
+    row (same source, created_at and text) instead of being inserted
+    again. Returns the ids actually inserted. Caller commits.
+    """
+    if not events:
+        return {"inserted": 0, "skipped": 0, "event_ids": set()}
+
+    buf = io.StringIO()
+    for event in events:
+        buf.write("\t".join(_copy_escape(event.get(col)) for col in EVENT_COLUMNS))
+        buf.write("\n")
+    buf.seek(0)
+
+    columns = ", ".join(EVENT_COLUMNS)
     with conn.cursor() as cur:
-        for event in events:
-            cur.execute(
-                """
-                INSERT INTO events (
-                    event_id, source, author_id, text_raw, text_processed, created_at,
-                    confidence_score, heat_score, lang, geo, context_annotations,
-                    hashtags, emojis
-                )
-                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                ON CONFLICT (event_id) DO NOTHING;
-                """,
-                (
-                    event.get("event_id"),
-                    event.get("source"),
-                    event.get("author_id"),
-                    event.get("text_raw"),
-                    event.get("text_processed"),
-                    event.get("created_at"),
-                    event.get("confidence_score"),
-                    event.get("heat_score"),
-                    event.get("lang"),
-                    event.get("geo"),
-                    event.get("context_annotations"),
-                    event.get("hashtags"),
-                    event.get("emojis"),
-                ),
-            )
-
+        cur.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS events_staging
+            (LIKE events INCLUDING DEFAULTS)
+            ON COMMIT DELETE ROWS;
+            """
+        )
+        cur.execute("TRUNCATE events_staging;")
+        cur.copy_expert(
+            f"COPY events_staging ({columns}) FROM STDIN",
+            buf,
+        )
+        cur.execute(
+            """
+            UPDATE events ev
+            SET channel = legacy.channel,
+                message_id = legacy.message_id
+            FROM (
+                SELECT DISTINCT ON (s.source, s.channel, s.message_id)
+                    old.event_id, s.source, s.channel, s.message_id
+                FROM events_staging s
+                JOIN events old
+                  ON old.message_id IS NULL
+                 AND old.created_at = s.created_at
+                 AND old.source = s.source
+                 AND old.text_raw = s.text_raw
+                WHERE s.message_id IS NOT NULL
+                  AND old.event_id <> s.event_id
+                ORDER BY s.source, s.channel, s.message_id, old.event_id
+            ) AS legacy
+            WHERE ev.event_id = legacy.event_id
+              AND NOT EXISTS (
+                  SELECT 1 FROM events known
+                  WHERE known.source = legacy.source
+                    AND known.channel = legacy.channel
+                    AND known.message_id = legacy.message_id
+              );
+            """
+        )
+        if cur.rowcount:
+            print(f"[refresh_db] matched {cur.rowcount} events stored under legacy ids")
+        cur.execute(
+            f"""
+            INSERT INTO events ({columns})
+            SELECT {columns} FROM events_staging
+            ON CONFLICT DO NOTHING
+            RETURNING event_id;
+            """
+        )
+        inserted_ids = {event_id for (event_id,) in cur.fetchall()}
+        cur.execute("TRUNCATE events_staging;")
+
+    inserted = len(inserted_ids)
+    result = {"inserted": inserted, "skipped": len(events) - inserted, "event_ids": inserted_ids}
+    print(f"[refresh_db] inserted {result['inserted']} events, skipped {result['skipped']}")
+    return result
+
+
+def _reset_events(conn):
+    """Wipe events and derived state. Caller commits (with the first chunk)."""
+    disable_statement_timeout(conn)
+    clear_events_table(conn)
+    clear_fingerprints(conn)
+    clear_high_water_marks(conn)
+    rebuild_relation_aggregates(conn)
+
+
+def _ingest_chunk(conn, chunk, track_high_water: bool, reset_first: bool = False) -> dict:
+    """
+    clean -> insert -> fingerprint one chunk, in one transaction.
+    `reset_first` wipes the events table in that same transaction.
+    """
+    processed_events = preprocess_batch(chunk)
+    if reset_first:
+        _reset_events(conn)
+    result = insert_events(conn, processed_events)
+    inserted_ids = result.pop("event_ids")
+    # skipped posts are already fingerprinted under their stored id
+    fingerprints = register_fingerprints(
+        conn, [event for event in processed_events if event["event_id"] in inserted_ids]
+    )
+    if track_high_water:
+        advance_high_water_marks(conn, high_water_marks_from_posts(chunk))
+    conn.commit()
+    return {
+        **result,
+        "cleaned": len(processed_events),
+        "near_duplicates": fingerprints["near_duplicates"],
+    }
+
+
+async def ingest_stream(
+    chunks,
+    *,
+    clear_first: bool = False,
+    track_high_water: bool = False,
+    progress: dict | None = None,
+) -> dict:
+    """
+    fetch -> clean -> insert pipeline over an async iterator of post chunks.
+    Each chunk is committed on its own, so memory stays flat and rows
+    inserted before a failure are kept. With `clear_first` the wipe is
+    committed together with the first chunk, so a fetch that fails
+    before any data arrives leaves the table untouched.
+
+    With `track_high_water`, per-channel high-water marks advance in the
+    same transaction as each chunk. New events are fingerprinted and
+    near-duplicates linked to their canonical event as they are inserted.
+
+    Chunk work runs on the DB thread pool; fetching the next chunk keeps
+    going on the event loop. Running totals are kept in `progress` (the
+    job heartbeat saves them) when given.
+    """
+    totals = progress if progress is not None else {}
+    totals.update({
+        "fetched": 0, "cleaned": 0, "inserted": 0, "skipped": 0,
+        "near_duplicates": 0, "chunks": 0,
+    })
+
+    # closing `chunks` on errors stops its fetch tasks and Telegram client
+    async with get_connection_async() as conn, aclosing(chunks):
+        reset_pending = clear_first
+
+        async for chunk in chunks:
+            result = await run_db(_ingest_chunk, conn, chunk, track_high_water, reset_pending)
+            reset_pending = False
+
+            totals["fetched"] += len(chunk)
+            totals["cleaned"] += result["cleaned"]
+            totals["inserted"] += result["inserted"]
+            totals["skipped"] += result["skipped"]
+            totals["near_duplicates"] += result["near_duplicates"]
+            totals["chunks"] += 1
+
+        # the fetch succeeded but the window was empty
+        if reset_pending:
+            await run_db(_ingest_chunk, conn, [], track_high_water, True)
+
+    totals["duplicate_ratio"] = (
+        round(totals["near_duplicates"] / totals["inserted"], 4)
+        if totals["inserted"] else None
+    )
+
+    print(f"[refresh_db] ingestion done: {totals}")
+    return dict(totals)
+
+
+# Job bodies below run under storage.jobs.run_job (claimed job, heartbeat
+# lease, progress counters); see the ingestion routes.
 
 # FULL REBOOT OPTION :
 # Delete table and fetch all events from last 3 months
-async def full_reboot_events(months_back: int):
-
-    job_name = "full_reboot"
-    if is_job_running(job_name):
-        return  
-    start_job(job_name)
-
-    try:
-        raw_events = await fetch_telegram(months_back)
-        processed_events = preprocess_batch(raw_events)
-
-        with get_connection() as conn:
-            clear_events_table(conn)
-            insert_events(conn, processed_events)
-            conn.commit()
-
-        finish_job(job_name)
-
-    except Exception as e:
-        fail_job(job_name, str(e))
-        raise
+async def full_reboot_events(months_back: int, progress: dict | None = None):
+    return await ingest_stream(
+        iter_telegram(months_back),
+        clear_first=True,
+        track_high_water=True,
+        progress=progress,
+    )
 
 
 # UP TO DATE REFRESH OPTION
-# Add the events missing from the last month until today
-
-async def incremental_refresh_events(months_back: int):
-    job_name = "incremental_refresh"
-
-    if is_job_running(job_name):
-        return
-
-    start_job(job_name)
+# Add the events newer than each channel's high-water mark, for every
+# configured channel (channels never fetched start from last month)
 
-    try:
-        raw_events = await fetch_telegram(months_back)
-        processed_events = preprocess_batch(raw_events)
-
-        with get_connection() as conn:
-            insert_events(conn, processed_events)
-            conn.commit()
-
-        finish_job(job_name)
-
-    except Exception as e:
-        fail_job(job_name, str(e))
-        raise
+async def incremental_refresh_events(months_back: int, progress: dict | None = None):
+    marks = await run_db(get_high_water_marks)
+    return await ingest_stream(
+        iter_telegram_incremental(marks, months_back),
+        track_high_water=True,
+        progress=progress,
+    )
 
 
 # Period start / end specified lookup option
 async def fetch_events_for_period(
     start_date: datetime,
     end_date: datetime,
+    progress: dict | None = None,
 ):
-    job_name = "fetch_period"
-    if is_job_running(job_name):
-        return 
-    start_job(job_name)
-
-    try:
-        raw_events = await fetch_telegram_period(start_date, end_date)
-
-        processed_events = preprocess_batch(raw_events)
-
-        with get_connection() as conn:
-            insert_events(conn, processed_events)
-            conn.commit()
-
-        finish_job(job_name)
-
-    except Exception as e:
-        fail_job(job_name, str(e))
-        raise
-
-# LLM jobs background runner
-async def run_llm_processing_job(mode, limit):
-    try:
-        await process(mode=mode, limit=limit)
-        finish_job("llm_processing")
-    except Exception as e:
-        fail_job("llm_processing", str(e))
-
+    return await ingest_stream(
+        iter_telegram_period(start_date, end_date),
+        progress=progress,
+    )
@@ -0,0 +1,198 @@
+from storage.db import get_connection, disable_statement_timeout
+from storage.aggregates import (
+    RELATION_DAILY_DDL,
+    RELATION_ROLLUP_DDL,
+    rebuild_relation_aggregates,
+    rebuild_relation_rollups,
+)
+from storage.channel_state import CHANNEL_STATE_DDL
+from storage.data_version import DATA_VERSION_DDL
+from storage.jobs import JOBS_LEASE_DDL
+from storage.fingerprints import (
+    EVENT_FINGERPRINTS_DDL,
+    SOURCE_ROW_DDL,
+    backfill_fingerprints,
+)
+
+
+# Idempotent DDL for tables/indexes added on top of the base schema
+# (events, actortargetevents, states, jobs). Applied on app startup.
+SCHEMA_STATEMENTS = [
+    # Durable tier of the LLM result caches (grounding, ...)
+    """
+    CREATE TABLE IF NOT EXISTS llm_cache (
+        namespace   TEXT        NOT NULL,
+        cache_key   TEXT        NOT NULL,
+        value       JSONB       NOT NULL,
+        created_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (namespace, cache_key)
+    );
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS llm_cache_created_at_idx
+        ON llm_cache (namespace, created_at);
+    """,
+    # Sentence materialization watermark: events still to be split into
+    # actortargetevents rows have materialized_at IS NULL. Backfilled once
+    # from existing actortargetevents when the column is added.
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'events' AND column_name = 'materialized_at'
+        ) THEN
+            ALTER TABLE events ADD COLUMN materialized_at TIMESTAMPTZ;
+            UPDATE events ev
+            SET materialized_at = NOW()
+            WHERE EXISTS (
+                SELECT 1 FROM actortargetevents ate
+                WHERE ate.event_id = ev.event_id
+            );
+        END IF;
+    END $$;
+    """,
+    # Post identity behind the derived event_id; re-fetched posts are
+    # deduplicated on it. Events stored before it have NULLs and a random
+    # id; ingestion matches them by (source, created_at, text_raw).
+    """
+    ALTER TABLE events ADD COLUMN IF NOT EXISTS channel TEXT;
+    ALTER TABLE events ADD COLUMN IF NOT EXISTS message_id BIGINT;
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS events_post_identity_idx
+        ON events (source, channel, message_id)
+        WHERE message_id IS NOT NULL;
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS events_legacy_id_idx
+        ON events (created_at)
+        WHERE message_id IS NULL;
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS events_unmaterialized_idx
+        ON events (event_id)
+        WHERE materialized_at IS NULL AND text_processed IS NOT NULL;
+    """,
+    # Set by the processor's relevance pre-filter for sentences it skips
+    """
+    ALTER TABLE actortargetevents
+        ADD COLUMN IF NOT EXISTS relevance_skipped BOOLEAN NOT NULL DEFAULT FALSE;
+    """,
+    # Filter rule version + threshold a row was skipped under; rows skipped
+    # under another one are re-scored
+    """
+    ALTER TABLE actortargetevents
+        ADD COLUMN IF NOT EXISTS relevance_filter TEXT;
+    """,
+    # Event timestamp carried onto sentence rows, so date-window relation
+    # queries never join events. Backfilled once when the column is added.
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'actortargetevents' AND column_name = 'created_at'
+        ) THEN
+            ALTER TABLE actortargetevents ADD COLUMN created_at TIMESTAMPTZ;
+            UPDATE actortargetevents ate
+            SET created_at = ev.created_at::timestamptz
+            FROM events ev
+            WHERE ev.event_id = ate.event_id;
+        END IF;
+    END $$;
+    """,
+    # Relation reads go through relation_daily / relation_rollup; this
+    # index only cost HOT updates on every grounding write
+    """
+    DROP INDEX IF EXISTS actortargetevents_relations_idx;
+    """,
+    RELATION_DAILY_DDL,
+    # Duplicated the primary key; INCLUDE (weight) made every weight
+    # upsert a non-HOT update maintaining two btrees
+    """
+    DROP INDEX IF EXISTS relation_daily_covering_idx;
+    """,
+    RELATION_ROLLUP_DDL,
+    CHANNEL_STATE_DDL,
+    EVENT_FINGERPRINTS_DDL,
+    SOURCE_ROW_DDL,
+    DATA_VERSION_DDL,
+    JOBS_LEASE_DDL,
+    # Row claims of LLM workers (llm_actor_target_processing/worker.py);
+    # the partial index holds the rows a worker may still claim
+    """
+    ALTER TABLE actortargetevents ADD COLUMN IF NOT EXISTS claimed_by TEXT;
+    ALTER TABLE actortargetevents ADD COLUMN IF NOT EXISTS claimed_until TIMESTAMPTZ;
+    ALTER TABLE actortargetevents ADD COLUMN IF NOT EXISTS attempted_at TIMESTAMPTZ;
+    """,
+    # Worker runs in which a row raised, and the last error; rows that
+    # failed ROW_MAX_FAILURES times are no longer claimed
+    """
+    ALTER TABLE actortargetevents ADD COLUMN IF NOT EXISTS failures INTEGER NOT NULL DEFAULT 0;
+    ALTER TABLE actortargetevents ADD COLUMN IF NOT EXISTS last_error TEXT;
+    """,
+    # Set by extraction when a sentence holds no complete actor/target/
+    # event; such rows are done for workers and leave the claim index
+    """
+    ALTER TABLE actortargetevents
+        ADD COLUMN IF NOT EXISTS no_event BOOLEAN NOT NULL DEFAULT FALSE;
+    """,
+    """
+    DROP INDEX IF EXISTS actortargetevents_claimable_idx;
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS actortargetevents_claim_idx
+        ON actortargetevents (id)
+        WHERE source_row_id IS NULL
+          AND relevance_skipped = FALSE
+          AND states_resolved = FALSE
+          AND no_event = FALSE;
+    """,
+]
+
+# Derived tables populated from existing data the first time they are created
+BACKFILLS = {
+    "relation_daily": rebuild_relation_aggregates,
+    "relation_rollup": rebuild_relation_rollups,
+}
+
+# One-off migrations run the first time a column is added
+COLUMN_BACKFILLS = {
+    # events stored under random ids were never fingerprinted
+    ("events", "message_id"): backfill_fingerprints,
+}
+
+
+def ensure_schema():
+    with get_connection() as conn:
+        # one-time backfills and rebuilds scan whole tables
+        disable_statement_timeout(conn)
+        with conn.cursor() as cur:
+            missing = []
+            for table in BACKFILLS:
+                cur.execute("SELECT to_regclass(%s);", (table,))
+                if cur.fetchone()[0] is None:
+                    missing.append(table)
+            missing_columns = []
+            for table, column in COLUMN_BACKFILLS:
+                cur.execute(
+                    """
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = %s AND column_name = %s;
+                    """,
+                    (table, column),
+                )
+                if cur.fetchone() is None:
+                    missing_columns.append((table, column))
+
+            for statement in SCHEMA_STATEMENTS:
+                cur.execute(statement)
+
+        for table in missing:
+            print(f"[schema] backfilling {table}")
+            BACKFILLS[table](conn)
+        for table, column in missing_columns:
+            print(f"[schema] backfilling for {table}.{column}")
+            COLUMN_BACKFILLS[(table, column)](conn)
+        conn.commit()
@@ -0,0 +1,244 @@
+import os
+import asyncio
+from typing import Dict, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+from storage.db import get_pool, run_db
+from storage.aggregates import add_to_relation_aggregates
+from storage.fingerprints import propagate_to_linked_rows
+from storage.data_version import bump_data_version, forget_data_version
+
+
+# Rows buffered before a flush is forced
+FLUSH_SIZE = int(os.getenv("DB_WRITE_FLUSH_SIZE", 200))
+# Maximum seconds a buffered row waits before being flushed
+FLUSH_INTERVAL_S = float(os.getenv("DB_WRITE_FLUSH_INTERVAL_S", 2.0))
+# Cap of the periodic flush's backoff after failed flushes
+FLUSH_MAX_BACKOFF_S = float(os.getenv("DB_WRITE_FLUSH_MAX_BACKOFF_S", 60.0))
+
+
+class ActorTargetWriteBuffer:
+    """
+    Write-behind buffer for actortargetevents extraction/grounding results.
+
+    Collects per-row updates and writes them as one bulk
+    `UPDATE ... FROM (VALUES ...)` per kind, on a single long-lived
+    connection. Flushes when `flush_size` rows are pending, every
+    `flush_interval_s` seconds, and always on exit (including errors).
+    Flushes run on the DB thread pool, one at a time. A failed flush puts
+    its updates back (newer ones for the same row win) and raises; the
+    periodic flush retries with backoff. Flushes that ground rows bump
+    the data version, so cached relation responses follow long-running
+    workers too.
+
+        async with ActorTargetWriteBuffer() as writer:
+            await writer.add_extraction(...)
+    """
+
+    def __init__(
+        self,
+        flush_size: int = FLUSH_SIZE,
+        flush_interval_s: float = FLUSH_INTERVAL_S,
+    ):
+        self.flush_size = max(1, flush_size)
+        self.flush_interval_s = flush_interval_s
+        self._extractions: Dict[int, Tuple] = {}
+        self._groundings: Dict[int, Tuple] = {}
+        self._pool = None
+        self.conn = None
+        self._ticker: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self.stats = {"flushes": 0, "extractions": 0, "groundings": 0}
+
+    async def __aenter__(self):
+        self._pool = await run_db(get_pool)
+        self.conn = await run_db(self._pool.getconn)
+        if self.flush_interval_s > 0:
+            self._ticker = asyncio.create_task(self._flush_periodically())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._ticker is not None:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self.flush_async()
+        except Exception as e:
+            if exc is None:
+                raise
+            print(f"[write_buffer] final flush failed, {self.pending} updates lost: {e}")
+        finally:
+            await run_db(self._pool.putconn, self.conn)
+        return False
+
+    @property
+    def pending(self) -> int:
+        return len(self._extractions) + len(self._groundings)
+
+    async def add_extraction(
+        self,
+        *,
+        row_id: int,
+        actor: Optional[str],
+        target: Optional[str],
+        event_type: Optional[str],
+    ):
+        self._extractions[row_id] = (row_id, actor, target, event_type)
+        await self._maybe_flush()
+
+    async def add_grounding(
+        self,
+        *,
+        row_id: int,
+        actor_state: Optional[str],
+        target_state: Optional[str],
+        actor_state_iso3: Optional[str],
+        target_state_iso3: Optional[str],
+    ):
+        self._groundings[row_id] = (
+            row_id,
+            actor_state,
+            target_state,
+            actor_state_iso3,
+            target_state_iso3,
+        )
+        await self._maybe_flush()
+
+    async def _maybe_flush(self):
+        if self.pending >= self.flush_size:
+            await self.flush_async()
+
+    async def _flush_periodically(self):
+        delay = self.flush_interval_s
+        while True:
+            await asyncio.sleep(delay)
+            if not self.pending:
+                continue
+            try:
+                await self.flush_async()
+                delay = self.flush_interval_s
+            except Exception as e:
+                delay = min(delay * 2, FLUSH_MAX_BACKOFF_S)
+                print(f"[write_buffer] periodic flush failed, retrying in {delay:.0f}s: {e}")
+
+    def _take(self):
+        extractions = list(self._extractions.values())
+        groundings = list(self._groundings.values())
+        self._extractions.clear()
+        self._groundings.clear()
+        return extractions, groundings
+
+    def _put_back(self, extractions, groundings):
+        """Re-buffer updates of a failed flush, keeping newer ones."""
+        for row in extractions:
+            self._extractions.setdefault(row[0], row)
+        for row in groundings:
+            self._groundings.setdefault(row[0], row)
+
+    def flush(self):
+        """Write every buffered update in one transaction (blocking)."""
+        if self.pending:
+            taken = self._take()
+            try:
+                self._write(*taken)
+            except Exception:
+                self._put_back(*taken)
+                raise
+
+    async def flush_async(self):
+        """flush() without blocking the event loop."""
+        async with self._flush_lock:
+            if self.pending:
+                # buffers are swapped on the loop thread, written off it
+                taken = self._take()
+                try:
+                    await run_db(self._write, *taken)
+                except Exception:
+                    self._put_back(*taken)
+                    raise
+
+    def _write(self, extractions, groundings):
+        if self.conn.closed:
+            # dropped connection: swap it for a healthy one from the pool
+            self._pool.putconn(self.conn)
+            self.conn = self._pool.getconn()
+        try:
+            with self.conn.cursor() as cur:
+                # extraction first: a row may carry both in the same flush
+                if extractions:
+                    execute_values(
+                        cur,
+                        """
+                        UPDATE actortargetevents AS ate
+                        SET actor = v.actor,
+                            target = v.target,
+                            event_type = v.event_type,
+                            -- incomplete result: nothing to ground
+                            no_event = (
+                                COALESCE(v.actor, '') = ''
+                                OR COALESCE(v.target, '') = ''
+                                OR COALESCE(v.event_type, '') = ''
+                            )
+                        FROM (VALUES %s) AS v(id, actor, target, event_type)
+                        WHERE ate.id = v.id;
+                        """,
+                        extractions,
+                        template="(%s::bigint, %s::text, %s::text, %s::text)",
+                        page_size=len(extractions),
+                    )
+                grounded_ids = []
+                if groundings:
+                    # first grounding wins: the states_resolved guard is
+                    # re-checked on the latest row version, so a row grounded
+                    # concurrently (e.g. by a worker that reclaimed it) is
+                    # skipped and counted towards relation_daily only once
+                    grounded_ids = execute_values(
+                        cur,
+                        """
+                        UPDATE actortargetevents AS ate
+                        SET actor_state = v.actor_state,
+                            target_state = v.target_state,
+                            actor_state_iso3 = v.actor_state_iso3,
+                            target_state_iso3 = v.target_state_iso3,
+                            states_resolved = TRUE
+                        FROM (VALUES %s) AS v(
+                            id, actor_state, target_state,
+                            actor_state_iso3, target_state_iso3
+                        )
+                        WHERE ate.id = v.id
+                          AND ate.states_resolved = FALSE
+                        RETURNING ate.id;
+                        """,
+                        groundings,
+                        template="(%s::bigint, %s::text, %s::text, %s::text, %s::text)",
+                        page_size=len(groundings),
+                        fetch=True,
+                    )
+                    add_to_relation_aggregates(cur, [row_id for (row_id,) in grounded_ids])
+                    if grounded_ids:
+                        # cached /relations responses are stale now
+                        bump_data_version(cur)
+                # near-duplicate copies follow their canonical rows
+                propagate_to_linked_rows(
+                    cur,
+                    {row[0] for row in extractions} | {row[0] for row in groundings},
+                )
+            self.conn.commit()
+            if grounded_ids:
+                forget_data_version()
+        except Exception:
+            if not self.conn.closed:
+                self.conn.rollback()
+            raise
+
+        self.stats["flushes"] += 1
+        self.stats["extractions"] += len(extractions)
+        self.stats["groundings"] += len(groundings)
+        print(
+            f"[write_buffer] flushed {len(extractions)} extractions, "
+            f"{len(groundings)} groundings"
+        )
@@ -0,0 +1,50 @@
+import pytest
+
+from storage.refresh_db import EVENT_COLUMNS, _copy_escape
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, "\\N"),
+        ("plain", "plain"),
+        (42, "42"),
+        ("tab\there", "tab\\there"),
+        ("line\nbreak", "line\\nbreak"),
+        ("carriage\rreturn", "carriage\\rreturn"),
+        ("back\\slash", "back\\\\slash"),
+        # a literal backslash-n must not turn into a newline on load
+        ("\\n", "\\\\n"),
+        ("\\N", "\\\\N"),
+        ("", ""),
+    ],
+)
+def test_copy_escape(value, expected):
+    assert _copy_escape(value) == expected
+
+
+def _copy_unescape(field: str):
+    """What COPY ... FROM STDIN (text format) reads back."""
+    if field == "\\N":
+        return None
+    out, i = [], 0
+    escapes = {"n": "\n", "r": "\r", "t": "\t", "\\": "\\"}
+    while i < len(field):
+        if field[i] == "\\":
+            out.append(escapes[field[i + 1]])
+            i += 2
+        else:
+            out.append(field[i])
+            i += 1
+    return "".join(out)
+
+
+def test_rows_round_trip_through_copy_format():
+    values = ["a\tb", "multi\nline\r\n", "C:\\path\\n", None, "emoji \U0001F4A5"]
+    line = "\t".join(_copy_escape(value) for value in values)
+    assert "\n" not in line
+    assert [_copy_unescape(field) for field in line.split("\t")] == values
+
+
+def test_event_columns_include_post_identity():
+    assert {"event_id", "channel", "message_id"} <= set(EVENT_COLUMNS)
@@ -0,0 +1,47 @@
+import uuid
+
+from preprocessing.batch_preprocessing import make_event_id, preprocess_batch
+
+
+def _post(**fields):
+    return {"source": "telegram", "text_raw": "Missile strike on Kyiv.", **fields}
+
+
+def test_event_id_is_stable_for_the_same_post():
+    post = _post(channel="worldnews", message_id=42)
+    assert make_event_id(post, "a") == make_event_id(dict(post), "b")
+    uuid.UUID(make_event_id(post, "a"))
+
+
+def test_event_id_differs_per_channel_and_message():
+    ids = {
+        make_event_id(_post(channel="worldnews", message_id=42), ""),
+        make_event_id(_post(channel="worldnews", message_id=43), ""),
+        make_event_id(_post(channel="othernews", message_id=42), ""),
+        make_event_id(_post(source="x", channel="worldnews", message_id=42), ""),
+    }
+    assert len(ids) == 4
+
+
+def test_message_id_zero_is_an_identity():
+    with_zero = make_event_id(_post(channel="worldnews", message_id=0), "text")
+    without = make_event_id(_post(), "text")
+    assert with_zero != without
+
+
+def test_event_id_falls_back_to_normalized_text():
+    a = make_event_id(_post(), "Missile  strike\non KYIV")
+    b = make_event_id(_post(), "missile strike on kyiv")
+    assert a == b
+    assert a != make_event_id(_post(), "missile strike on lviv")
+
+
+def test_preprocess_batch_drops_in_batch_duplicates():
+    batch = [
+        _post(channel="worldnews", message_id=1),
+        _post(channel="worldnews", message_id=1, text_raw="edited"),
+        _post(channel="worldnews", message_id=2),
+    ]
+    processed = preprocess_batch(batch)
+    assert [post["message_id"] for post in processed] == [1, 2]
+    assert processed[0]["text_processed"] == "Missile strike on Kyiv."
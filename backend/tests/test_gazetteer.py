@@ -0,0 +1,67 @@
+import pytest
+
+from llm_actor_target_processing.gazetteer import Gazetteer, normalize_text
+
+STATES = [
+    ("Russia", "RUS"),
+    ("Ukraine", "UKR"),
+    ("United States", "USA"),
+    ("Saudi Arabia", "SAU"),
+]
+
+
+@pytest.fixture
+def gazetteer():
+    return Gazetteer(STATES)
+
+
+def test_normalize_text():
+    assert normalize_text("  Élysée—Palace's ") == "elysee palace s"
+    assert normalize_text(None) == ""
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Russia", "Russia"),
+        ("Russian forces", "Russia"),
+        ("the Kremlin", "Russia"),
+        ("Ukrainian government", "Ukraine"),
+        # longest match wins over the aliases it contains
+        ("United States of America", "United States"),
+        ("Russian Federation", "Russia"),
+        ("Saudi Arabia", "Saudi Arabia"),
+    ],
+)
+def test_lookup_resolves(gazetteer, text, expected):
+    assert gazetteer.lookup(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        None,
+        "",
+        "Hamas",
+        "Russia and Ukraine",  # two states
+        "Russian oligarch",  # not a generic role word
+        "Prussia",  # whole words only
+    ],
+)
+def test_lookup_leaves_unclear_text_to_the_llm(gazetteer, text):
+    assert gazetteer.lookup(text) is None
+
+
+def test_anchor_allows_other_words(gazetteer):
+    assert gazetteer.anchor("Russian oligarch") == "RUS"
+    assert gazetteer.anchor("Russia and Ukraine") is None
+    assert gazetteer.anchor("Hamas") is None
+
+
+def test_resolve_pair_needs_both_sides(gazetteer):
+    assert gazetteer.resolve_pair("Russian forces", "Kyiv") == {
+        "actor_state": "Russia",
+        "target_state": "Ukraine",
+    }
+    assert gazetteer.resolve_pair("Russian forces", "Hamas") is None
+    assert gazetteer.snapshot()["resolved"] == 1
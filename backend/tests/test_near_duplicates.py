@@ -0,0 +1,76 @@
+import pytest
+
+from preprocessing.near_duplicates import (
+    SIMHASH_BANDS,
+    SimHashIndex,
+    bands,
+    from_signed64,
+    hamming,
+    simhash,
+    to_signed64,
+)
+
+TEXT = (
+    "Russian forces struck energy infrastructure in the Kharkiv region "
+    "overnight, regional officials said on Tuesday morning."
+)
+
+
+def test_short_or_empty_text_has_no_hash():
+    assert simhash(None) is None
+    assert simhash("") is None
+    assert simhash("too short to compare") is None
+
+
+def test_simhash_ignores_case_and_punctuation():
+    assert simhash(TEXT) == simhash(TEXT.upper().replace(",", " ;"))
+
+
+def test_one_word_edit_stays_near():
+    edited = TEXT.replace("Tuesday", "Wednesday")
+    assert hamming(simhash(TEXT), simhash(edited)) <= 6
+
+
+def test_unrelated_text_is_far():
+    other = (
+        "The central bank kept interest rates unchanged and signalled "
+        "a cautious outlook for inflation over the coming year."
+    )
+    assert hamming(simhash(TEXT), simhash(other)) > 6
+
+
+@pytest.mark.parametrize("value", [0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1])
+def test_signed64_round_trip(value):
+    signed = to_signed64(value)
+    assert -(1 << 63) <= signed < 1 << 63
+    assert from_signed64(signed) == value
+
+
+def test_bands_split_all_bits():
+    value = 0x0123456789ABCDEF
+    parts = bands(value)
+    assert len(parts) == SIMHASH_BANDS
+    assert sum(part << (i * 8) for i, part in enumerate(parts)) == value
+
+
+def test_index_finds_closest_within_max_hamming():
+    index = SimHashIndex(max_hamming=3)
+    base = 0xFFFF_0000_FFFF_0000
+    index.add("far", base ^ 0b111)
+    index.add("near", base ^ 0b1)
+    assert index.find(base) == "near"
+    # at least 4 bits from every entry: shares bands but is too far
+    assert index.find(base ^ (1 | 1 << 8 | 1 << 16 | 1 << 24) ^ 0b111) is None
+
+
+def test_index_links_a_differing_bit_in_every_band_up_to_the_limit():
+    # max_hamming < SIMHASH_BANDS guarantees a shared band
+    index = SimHashIndex(max_hamming=SIMHASH_BANDS - 1)
+    index.add("canonical", 0)
+    flipped = sum(1 << (i * 8) for i in range(SIMHASH_BANDS - 1))
+    assert index.find(flipped) == "canonical"
+
+
+def test_index_rejects_limit_without_shared_band_guarantee():
+    with pytest.raises(ValueError):
+        SimHashIndex(max_hamming=SIMHASH_BANDS)
@@ -0,0 +1,43 @@
+from llm_actor_target_processing.extract import parse_batch_output
+
+ITEMS = [
+    ("event-1", 0, "Russia struck Kyiv."),
+    ("event-1", 1, "Officials met on Tuesday."),
+    ("event-2", 0, "Iran warned Israel."),
+]
+
+
+def test_rows_by_position():
+    output = """
+    Here you go:
+    [
+      {"index": 0, "actor": "Russia", "target": "Kyiv", "event": "ATTACK"},
+      {"index": 1, "event": "UNDEFINED"},
+      {"index": "2", "actor": "Iran", "target": "Israel", "event": "THREATEN"}
+    ]
+    """
+    parsed = parse_batch_output(output, ITEMS)
+    assert set(parsed) == {0, 1, 2}
+    assert parsed[0][:3] == ITEMS[0]
+    assert parsed[0][5] == "ATTACK"
+    # answered, no event
+    assert parsed[1] is None
+    assert parsed[2][0] == "event-2"
+
+
+def test_missing_and_malformed_items_are_left_out():
+    output = """[
+      {"index": 0, "actor": "Russia", "target": "Kyiv", "event": "ATTACK"},
+      {"index": 0, "actor": "Ukraine", "target": "Russia", "event": "ATTACK"},
+      {"index": 7, "event": "ATTACK"},
+      {"index": 1, "actor": "x"},
+      "not an object"
+    ]"""
+    parsed = parse_batch_output(output, ITEMS)
+    # first answer per position wins; 1 has no "event", 2 is missing
+    assert list(parsed) == [0]
+    assert parsed[0][3] == "Russia"
+
+
+def test_no_array_falls_back_entirely():
+    assert parse_batch_output("I cannot help with that.", ITEMS) == {}
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta, timezone
+
+from ingestion.telegram.fetch_posts import split_period
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def test_ranges_are_contiguous_and_cover_the_period():
+    end = START + timedelta(days=10, hours=5)
+    ranges = split_period(START, end, split_days=3)
+    assert ranges[0][0] == START
+    assert ranges[-1][1] == end
+    for (_, prev_end), (next_start, _) in zip(ranges, ranges[1:]):
+        assert prev_end == next_start
+    assert all(e - s <= timedelta(days=3) for s, e in ranges)
+    assert len(ranges) == 4
+
+
+def test_short_period_is_one_range():
+    end = START + timedelta(hours=6)
+    assert split_period(START, end, split_days=7) == [(START, end)]
+
+
+def test_exact_multiple_has_no_empty_tail():
+    end = START + timedelta(days=6)
+    assert split_period(START, end, split_days=3) == [
+        (START, START + timedelta(days=3)),
+        (START + timedelta(days=3), end),
+    ]
+
+
+def test_split_days_below_one_is_one_day():
+    end = START + timedelta(days=2)
+    assert len(split_period(START, end, split_days=0)) == 2